@@ -1,8 +1,13 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for
+import threading
+import time
+from flask import Flask, render_template, request, redirect, url_for, jsonify
 from flask_sqlalchemy import SQLAlchemy
 from dotenv import load_dotenv
 from datetime import datetime
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
 
 # Load environment variables from .env file
 load_dotenv()
@@ -19,8 +24,61 @@ DB_NAME = os.getenv("DB_NAME")
 app.config['SQLALCHEMY_DATABASE_URI'] = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Connection pool: pre-ping and recycle keep MySQL's wait_timeout from
+# handing us dead connections; size/overflow bound concurrent connections
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+    'pool_size': int(os.getenv("DB_POOL_SIZE", 5)),
+    'max_overflow': int(os.getenv("DB_MAX_OVERFLOW", 10)),
+    'pool_timeout': int(os.getenv("DB_POOL_TIMEOUT", 30)),
+    'pool_recycle': int(os.getenv("DB_POOL_RECYCLE", 280)),
+    'pool_pre_ping': os.getenv("DB_POOL_PRE_PING", "1") == "1",
+}
+
+# --- Pool Telemetry ---
+# Pool events fire on whichever request thread uses the connection, so the
+# counters are updated under a lock
+pool_lock = threading.Lock()
+pool_stats = {'connects': 0, 'disconnects': 0, 'invalidations': 0, 'checkouts': 0,
+              'checkins': 0, 'timeouts': 0, 'connect_errors': 0}
+pool_wait = {'count': 0, 'total': 0.0, 'max': 0.0}
+
+def _count(name):
+    with pool_lock:
+        pool_stats[name] += 1
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            _count('timeouts')
+            raise
+        except Exception:
+            # Opening an overflow connection failed (refused, bad credentials)
+            _count('connect_errors')
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with pool_lock:
+                pool_wait['count'] += 1
+                pool_wait['total'] += waited
+                pool_wait['max'] = max(pool_wait['max'], waited)
+
+app.config['SQLALCHEMY_ENGINE_OPTIONS']['poolclass'] = TimedQueuePool
+
 db = SQLAlchemy(app)
 
+with app.app_context():
+    # Connections detached from the pool are closed outside it ('close_detached')
+    for event_name, counter in [('connect', 'connects'), ('close', 'disconnects'),
+                                ('close_detached', 'disconnects'),
+                                ('invalidate', 'invalidations'), ('checkout', 'checkouts'),
+                                ('checkin', 'checkins')]:
+        event.listen(db.engine, event_name, lambda *args, counter=counter: _count(counter))
+
 # --- Database Model ---
 class Item(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -90,6 +148,25 @@ def delete_item(item_id):
     except:
         return "There was an issue deleting that item."
 
+# METRICS: Connection pool occupancy and churn
+@app.route('/metrics')
+def metrics():
+    pool = db.engine.pool
+    with pool_lock:
+        stats = dict(pool_stats)
+        stats['checkout_wait_ms_avg'] = (
+            pool_wait['total'] / pool_wait['count'] * 1000 if pool_wait['count'] else 0.0
+        )
+        stats['checkout_wait_ms_max'] = pool_wait['max'] * 1000
+    return jsonify({
+        'pool': dict(stats,
+                     size=pool.size(),
+                     checked_out=pool.checkedout(),
+                     checked_in=pool.checkedin(),
+                     overflow=max(pool.overflow(), 0),
+                     max_overflow=pool._max_overflow),
+    })
+
 
 if __name__ == "__main__":
     # Create the database tables if they don't exist
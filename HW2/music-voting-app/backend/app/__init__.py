@@ -1,8 +1,16 @@
 from flask import Flask
 from flask_cors import CORS
 from config import Config
-from .extensions import db, bcrypt, jwt, migrate
+from .extensions import db, bcrypt, jwt, migrate, cache
 from .routes import main
+from .commands import register_commands
+from .vote_queue import vote_queue
+from .identity import init_identity
+from .leaderboard import leaderboard
+from .hashing import password_hasher
+from .db_pool import engine_options, init_pool_metrics
+from .profiling import query_profiler
+from .live import vote_stream
 
 def create_app(config_class=Config):
     app = Flask(__name__)
@@ -17,16 +25,31 @@ def create_app(config_class=Config):
         app, 
         resources={r"/api/*": {"origins": origins}},
         allow_headers=["Authorization", "Content-Type"],
+        expose_headers=["X-Next-Cursor", "Server-Timing"],
         supports_credentials=True
     )
 
+    # Pool sizing comes from the DB_POOL_* settings
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
+
     # Initialize extensions
     db.init_app(app)
+    init_pool_metrics(app)
+    query_profiler.init_app(app)
     bcrypt.init_app(app)
+    password_hasher.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
+    vote_queue.init_app(app)
+    init_identity(app)
+    leaderboard.init_app(app)
+    vote_stream.init_app(app)
 
     # Register blueprint
     app.register_blueprint(main, url_prefix='/api')
 
+    # Register CLI commands (flask reconcile-votes, ...)
+    register_commands(app)
+
     return app
\ No newline at end of file
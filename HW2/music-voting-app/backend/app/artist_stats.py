@@ -0,0 +1,133 @@
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .models import db, Album, ArtistStats, Song
+
+STAT_COLUMNS = ("album_count", "song_count", "album_votes", "song_votes")
+
+
+def bump_artist(artist, **deltas):
+    """Add deltas to an artist's totals, creating the row if needed. Does not commit."""
+    deltas = {name: value for name, value in deltas.items() if value}
+    if not deltas:
+        return
+    values = dict({name: 0 for name in STAT_COLUMNS}, artist=artist, **deltas)
+    increments = {name: getattr(ArtistStats, name) + value for name, value in deltas.items()}
+    if db.engine.dialect.name == "sqlite":
+        stmt = sqlite_insert(ArtistStats).values(values).on_conflict_do_update(
+            index_elements=[ArtistStats.artist], set_=increments
+        )
+    else:
+        stmt = mysql_insert(ArtistStats).values(values).on_duplicate_key_update(increments)
+    db.session.execute(stmt)
+
+
+def drop_empty_artist(artist):
+    """Remove the row once the artist's last album is gone."""
+    db.session.execute(
+        delete(ArtistStats).where(ArtistStats.artist == artist, ArtistStats.album_count <= 0)
+    )
+
+
+def album_totals(album_id):
+    """The deltas an album contributes to its artist's row, or None if it is missing."""
+    album = db.session.execute(
+        select(Album.artist, Album.vote_count).where(Album.id == album_id)
+    ).first()
+    if album is None:
+        return None
+    songs, song_votes = db.session.execute(
+        select(func.count(Song.id), func.coalesce(func.sum(Song.vote_count), 0))
+        .where(Song.album_id == album_id)
+    ).one()
+    return album.artist, {
+        "album_count": 1,
+        "song_count": songs,
+        "album_votes": album.vote_count,
+        "song_votes": song_votes,
+    }
+
+
+def move_album(album_id, old_artist, new_artist):
+    """Move an album's totals when its artist changes (call after the UPDATE)."""
+    if old_artist == new_artist:
+        return
+    _, totals = album_totals(album_id)
+    bump_artist(old_artist, **{name: -value for name, value in totals.items()})
+    drop_empty_artist(old_artist)
+    bump_artist(new_artist, **totals)
+
+
+def count_votes(kind, target_ids, delta):
+    """Add delta votes per target to the owning artists (vote paths).
+
+    One INSERT ... SELECT ... GROUP BY artist upsert, however many artists
+    the targets belong to.
+    """
+    if not target_ids or not delta:
+        return
+    if kind == "album":
+        column = "album_votes"
+        query = select(Album.artist).where(Album.id.in_(target_ids))
+    else:
+        column = "song_votes"
+        query = (
+            select(Album.artist)
+            .select_from(Song)
+            .join(Album, Album.id == Song.album_id)
+            .where(Song.id.in_(target_ids))
+        )
+    columns = {name: literal(0) for name in STAT_COLUMNS}
+    columns[column] = func.count() * delta
+    query = query.add_columns(
+        *(value.label(name) for name, value in columns.items())
+    ).group_by(Album.artist)
+    target = getattr(ArtistStats, column)
+    if db.engine.dialect.name == "sqlite":
+        stmt = sqlite_insert(ArtistStats).from_select(["artist", *STAT_COLUMNS], query)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ArtistStats.artist], set_={column: target + stmt.excluded[column]}
+        )
+    else:
+        stmt = mysql_insert(ArtistStats).from_select(["artist", *STAT_COLUMNS], query)
+        stmt = stmt.on_duplicate_key_update({column: target + stmt.inserted[column]})
+    db.session.execute(stmt)
+
+
+def rebuild_artist_stats(artists=None):
+    """Recompute rows from the album and song tables (all, or just `artists`).
+
+    Uses the denormalized vote_count columns; run reconcile-votes first if
+    those are in doubt. Does not commit.
+    """
+    album_filter = Album.artist.in_(list(artists)) if artists is not None else None
+    songs = select(
+        Song.album_id,
+        func.count().label("song_count"),
+        func.sum(Song.vote_count).label("song_votes"),
+    )
+    if album_filter is not None:
+        songs = songs.where(Song.album_id.in_(select(Album.id).where(album_filter)))
+    songs = songs.group_by(Song.album_id).subquery()
+
+    totals = (
+        select(
+            Album.artist,
+            func.count(),
+            func.coalesce(func.sum(songs.c.song_count), 0),
+            func.coalesce(func.sum(Album.vote_count), 0),
+            func.coalesce(func.sum(songs.c.song_votes), 0),
+        )
+        .select_from(Album)
+        .outerjoin(songs, songs.c.album_id == Album.id)
+        .group_by(Album.artist)
+    )
+    clear = delete(ArtistStats)
+    if album_filter is not None:
+        totals = totals.where(album_filter)
+        clear = clear.where(ArtistStats.artist.in_(list(artists)))
+    db.session.execute(clear)
+    db.session.execute(
+        insert(ArtistStats).from_select(["artist", *STAT_COLUMNS], totals)
+    )
+    return db.session.execute(select(func.count()).select_from(ArtistStats)).scalar()
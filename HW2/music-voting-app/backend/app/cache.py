@@ -0,0 +1,190 @@
+import base64
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, make_response, request
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with a per-entry TTL."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class RedisBackend:
+    """Shared backend over a redis client, so every worker sees the same entries.
+
+    Any object with the same get/set/incr/counter methods can be passed to
+    ResponseCache.init_app(app, backend=...) instead. Entries are stored as
+    JSON with the body base64-encoded, never pickled: whoever can write to
+    the Redis must not be able to run code in the workers.
+    """
+
+    def __init__(self, client, prefix="music-voting:"):
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url):
+        import redis
+
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        try:
+            data = json.loads(raw)
+            return {
+                "body": base64.b64decode(data["body"]),
+                "etag": str(data["etag"]),
+                "headers": {str(k): str(v) for k, v in data["headers"].items()},
+            }
+        except (ValueError, TypeError, KeyError, AttributeError):
+            return None  # not an entry we wrote; treat as a miss
+
+    def set(self, key, entry, ttl=None):
+        data = {
+            "body": base64.b64encode(entry["body"]).decode("ascii"),
+            "etag": entry["etag"],
+            "headers": entry["headers"],
+        }
+        self.client.set(self.prefix + key, json.dumps(data), ex=ttl)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+
+class ResponseCache:
+    """Caches whole GET responses keyed by a tag plus the request path.
+
+    Each tag (e.g. "albums" or "album:3") carries a version number that is part
+    of every key cached under it. invalidate() bumps the version, which makes
+    all variants of that tag (every page, sort and filter) unreachable at once
+    without touching unrelated entries; the orphans age out through the TTL
+    and LRU eviction. With a shared backend the versions live there too, so an
+    invalidation in one worker is seen by all of them.
+    """
+
+    def __init__(self, app=None):
+        self.local = None
+        self.shared = None
+        self.ttl = None
+        self.enabled = False
+        # Tag versions when there is no shared backend; kept out of the LRU so
+        # they are never evicted (which would resurrect stale entries)
+        self._versions = {}
+        self._versions_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app, backend=None):
+        self.local = LRUCache(app.config.get("CACHE_MAX_ENTRIES", 1024))
+        self.ttl = app.config.get("CACHE_TTL", 30)
+        self.enabled = app.config.get("CACHE_ENABLED", True)
+        if backend is None and app.config.get("CACHE_REDIS_URL"):
+            backend = RedisBackend.from_url(app.config["CACHE_REDIS_URL"])
+        self.shared = backend
+        app.extensions["response_cache"] = self
+
+    def _version(self, tag):
+        if self.shared is not None:
+            return self.shared.counter(f"version:{tag}")
+        return self._versions.get(tag, 0)
+
+    def invalidate(self, *tags):
+        """Drop every cached response stored under the given tags."""
+        if not self.enabled:
+            return
+        for tag in tags:
+            if self.shared is not None:
+                self.shared.incr(f"version:{tag}")
+            else:
+                with self._versions_lock:
+                    self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def _get(self, key):
+        entry = self.local.get(key)
+        if entry is None and self.shared is not None:
+            entry = self.shared.get(key)
+            if entry is not None:
+                self.local.set(key, entry, self.ttl)
+        return entry
+
+    def _set(self, key, entry):
+        self.local.set(key, entry, self.ttl)
+        if self.shared is not None:
+            self.shared.set(key, entry, self.ttl)
+
+    def cached(self, tag_func):
+        """Cache a GET view under the tag returned by tag_func(**view_kwargs).
+
+        tag_func may return a tuple of tags; the entry is then dropped when
+        any one of them is invalidated.
+        """
+
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+
+                tags = tag_func(**kwargs)
+                if isinstance(tags, str):
+                    tags = (tags,)
+                versions = ":".join(f"{tag}:v{self._version(tag)}" for tag in tags)
+                key = f"{versions}:{request.full_path}"
+                entry = self._get(key)
+                if entry is None:
+                    response = make_response(fn(*args, **kwargs))
+                    if response.status_code != 200:
+                        return response
+                    body = response.get_data()
+                    entry = {
+                        "body": body,
+                        "etag": hashlib.sha1(body).hexdigest(),
+                        "headers": dict(response.headers),
+                    }
+                    self._set(key, entry)
+
+                response = current_app.response_class(entry["body"], headers=entry["headers"])
+                response.set_etag(entry["etag"])
+                return response.make_conditional(request)
+
+            return wrapper
+
+        return decorator
@@ -0,0 +1,217 @@
+import csv
+import json
+import time
+from itertools import islice
+from sqlalchemy import insert, select
+from .artist_stats import rebuild_artist_stats
+from .extensions import cache
+from .leaderboard import leaderboard
+from .models import db, Album, Song
+
+
+class CatalogImportError(ValueError):
+    """A record that cannot be imported.
+
+    line is the input line it was found on (None for header or format
+    problems). import_catalog() sets stats to the counts committed before
+    the error, since earlier batches stay in the database.
+    """
+
+    def __init__(self, message, line=None):
+        super().__init__(message)
+        self.line = line
+        self.stats = None
+
+
+def _clean(value, field, line_no, max_length, required=True):
+    if value is not None and not isinstance(value, str):
+        raise CatalogImportError(f"Line {line_no}: {field} must be a string", line_no)
+    value = (value or "").strip()
+    if not value:
+        if required:
+            raise CatalogImportError(f"Line {line_no}: {field} is required", line_no)
+        return None
+    if len(value) > max_length:
+        raise CatalogImportError(f"Line {line_no}: {field} is longer than {max_length}", line_no)
+    return value
+
+
+def read_jsonl(lines):
+    """One album per line: {"title", "artist", "cover_image_url"?, "songs": [...]}.
+
+    Songs may be given as plain titles or as {"title": ...} objects.
+    """
+    for line_no, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError:
+            raise CatalogImportError(f"Line {line_no}: invalid JSON", line_no)
+        if not isinstance(data, dict):
+            raise CatalogImportError(f"Line {line_no}: expected a JSON object", line_no)
+        raw_songs = data.get("songs") or []
+        if not isinstance(raw_songs, list):
+            raise CatalogImportError(f"Line {line_no}: songs must be a list", line_no)
+        songs = []
+        for song in raw_songs:
+            if isinstance(song, dict):
+                title = song.get("title")
+            elif isinstance(song, str):
+                title = song
+            else:
+                raise CatalogImportError(
+                    f"Line {line_no}: each song must be a title or an object with a title",
+                    line_no,
+                )
+            songs.append(_clean(title, "song title", line_no, 120))
+        yield {
+            "title": _clean(data.get("title"), "title", line_no, 120),
+            "artist": _clean(data.get("artist"), "artist", line_no, 120),
+            "cover_image_url": _clean(
+                data.get("cover_image_url"), "cover_image_url", line_no, 255, required=False
+            ),
+            "songs": songs,
+        }
+
+
+def read_csv(lines):
+    """One song per row: title, artist, cover_image_url, song_title.
+
+    Rows repeat the album columns for each song; an empty song_title adds the
+    album alone.
+    """
+    reader = csv.DictReader(lines)
+    missing = {"title", "artist"} - set(reader.fieldnames or [])
+    if missing:
+        raise CatalogImportError(f"CSV header is missing: {', '.join(sorted(missing))}")
+    for line_no, row in enumerate(reader, start=2):
+        song = _clean(row.get("song_title"), "song_title", line_no, 120, required=False)
+        yield {
+            "title": _clean(row.get("title"), "title", line_no, 120),
+            "artist": _clean(row.get("artist"), "artist", line_no, 120),
+            "cover_image_url": _clean(
+                row.get("cover_image_url"), "cover_image_url", line_no, 255, required=False
+            ),
+            "songs": [song] if song else [],
+        }
+
+
+READERS = {"jsonl": read_jsonl, "csv": read_csv}
+
+
+def _album_ids(keys):
+    """Map (title, artist) -> id for the albums that already exist."""
+    rows = db.session.execute(
+        select(Album.id, Album.title, Album.artist).where(
+            Album.title.in_({title for title, _ in keys})
+        )
+    )
+    return {(r.title, r.artist): r.id for r in rows if (r.title, r.artist) in keys}
+
+
+def _import_batch(records, stats):
+    # Merge records for the same album, keeping the first cover and song order
+    albums = {}
+    for record in records:
+        key = (record["title"], record["artist"])
+        album = albums.setdefault(
+            key, {"cover_image_url": record["cover_image_url"], "songs": []}
+        )
+        album["cover_image_url"] = album["cover_image_url"] or record["cover_image_url"]
+        album["songs"].extend(record["songs"])
+
+    ids = _album_ids(albums.keys())
+    stats["duplicate_albums"] += len(ids)
+    new_albums = [
+        {"title": title, "artist": artist, "cover_image_url": album["cover_image_url"]}
+        for (title, artist), album in albums.items()
+        if (title, artist) not in ids
+    ]
+    if new_albums:
+        db.session.execute(insert(Album), new_albums)
+        # executemany gives no ids back on MySQL, so look them up again
+        ids = _album_ids(albums.keys())
+        stats["albums"] += len(new_albums)
+
+    existing_songs = set(
+        db.session.execute(
+            select(Song.album_id, Song.title).where(Song.album_id.in_(ids.values()))
+        ).all()
+    )
+    new_songs = []
+    for key, album in albums.items():
+        for title in album["songs"]:
+            song_key = (ids[key], title)
+            if song_key in existing_songs:
+                stats["duplicate_songs"] += 1
+                continue
+            existing_songs.add(song_key)
+            new_songs.append({"album_id": ids[key], "title": title})
+    if new_songs:
+        db.session.execute(insert(Song), new_songs)
+        stats["songs"] += len(new_songs)
+
+    rebuild_artist_stats({artist for _, artist in albums})
+    db.session.commit()
+    return ids.values()
+
+
+def detect_format(filename):
+    return "csv" if filename.lower().endswith(".csv") else "jsonl"
+
+
+def import_catalog(lines, fmt, batch_size):
+    """Stream albums with nested songs from a CSV or JSONL source into the database.
+
+    Records are read lazily and written in batches of batch_size, each with
+    one executemany INSERT per table and its own commit. Albums are
+    deduplicated on (title, artist) and songs on (album, title), both within
+    the file and against what is already stored. Returns counts and rates.
+
+    A bad record stops the import with CatalogImportError; the batches
+    committed before it stay, and the error's stats hold their counts.
+    """
+    if fmt not in READERS:
+        raise CatalogImportError(f"Unknown format '{fmt}'")
+    stats = {"albums": 0, "songs": 0, "duplicate_albums": 0, "duplicate_songs": 0, "batches": 0}
+    touched = set()
+    start = time.perf_counter()
+
+    records = READERS[fmt](lines)
+    try:
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                break
+            committed = dict(stats)
+            try:
+                touched.update(_import_batch(batch, stats))
+            except Exception:
+                stats.update(committed)  # the failed batch was rolled back
+                raise
+            stats["batches"] += 1
+    except CatalogImportError as e:
+        db.session.rollback()
+        e.stats = _with_rates(stats, start)
+        raise
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if stats["batches"]:
+            tags = ["albums"]
+            for album_id in touched:
+                tags += [f"album:{album_id}", f"album:{album_id}:songs"]
+            cache.invalidate(*tags)
+            leaderboard.reset()
+
+    return _with_rates(stats, start)
+
+
+def _with_rates(stats, start):
+    elapsed = time.perf_counter() - start
+    stats["seconds"] = round(elapsed, 3)
+    stats["albums_per_second"] = round(stats["albums"] / elapsed, 1) if elapsed else 0.0
+    stats["songs_per_second"] = round(stats["songs"] / elapsed, 1) if elapsed else 0.0
+    return stats
@@ -0,0 +1,77 @@
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import func, select, update
+from .artist_stats import rebuild_artist_stats
+from .catalog_import import CatalogImportError, detect_format, import_catalog
+from .models import db, Album, Song, album_votes, song_votes
+
+
+def reconcile_vote_counts():
+    """Rebuild Album.vote_count and Song.vote_count from the association tables."""
+    album_total = (
+        select(func.count())
+        .where(album_votes.c.album_id == Album.id)
+        .scalar_subquery()
+    )
+    song_total = (
+        select(func.count())
+        .where(song_votes.c.song_id == Song.id)
+        .scalar_subquery()
+    )
+    albums = db.session.execute(update(Album).values(vote_count=album_total)).rowcount
+    songs = db.session.execute(update(Song).values(vote_count=song_total)).rowcount
+    db.session.commit()
+    return albums, songs
+
+
+@click.command("reconcile-votes")
+@with_appcontext
+def reconcile_votes_command():
+    """Recompute the denormalized vote counters."""
+    albums, songs = reconcile_vote_counts()
+    click.echo(f"Reconciled vote counts for {albums} album(s) and {songs} song(s).")
+
+
+@click.command("rebuild-artist-stats")
+@with_appcontext
+def rebuild_artist_stats_command():
+    """Recompute the artist_stats table from albums and songs."""
+    artists = rebuild_artist_stats()
+    db.session.commit()
+    click.echo(f"Rebuilt stats for {artists} artist(s).")
+
+
+@click.command("import-catalog")
+@click.argument("source", type=click.File("r", encoding="utf8"))
+@click.option("--format", "fmt", type=click.Choice(["csv", "jsonl"]),
+              help="Input format (default: from the file extension).")
+@click.option("--batch-size", type=int, default=None,
+              help="Records per INSERT batch (default: IMPORT_BATCH_SIZE).")
+@with_appcontext
+def import_catalog_command(source, fmt, batch_size):
+    """Bulk load albums and songs from a CSV or JSONL file ('-' for stdin)."""
+    fmt = fmt or detect_format(source.name)
+    batch_size = batch_size or current_app.config["IMPORT_BATCH_SIZE"]
+    try:
+        stats = import_catalog(source, fmt, batch_size)
+    except CatalogImportError as e:
+        if e.stats and e.stats["batches"]:
+            raise click.ClickException(
+                f"{e}\nAlready imported before it: {e.stats['albums']} album(s) and "
+                f"{e.stats['songs']} song(s) in {e.stats['batches']} batch(es)."
+            )
+        raise click.ClickException(str(e))
+    click.echo(
+        f"Imported {stats['albums']} album(s) and {stats['songs']} song(s) "
+        f"in {stats['batches']} batch(es), {stats['seconds']}s "
+        f"({stats['albums_per_second']} albums/s, {stats['songs_per_second']} songs/s); "
+        f"skipped {stats['duplicate_albums']} duplicate album(s) "
+        f"and {stats['duplicate_songs']} duplicate song(s)."
+    )
+
+
+def register_commands(app):
+    app.cli.add_command(reconcile_votes_command)
+    app.cli.add_command(rebuild_artist_stats_command)
+    app.cli.add_command(import_catalog_command)
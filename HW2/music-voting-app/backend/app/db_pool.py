@@ -0,0 +1,129 @@
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+from .extensions import db
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long each checkout waited for a connection."""
+
+    metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            if self.metrics is not None:
+                self.metrics.record_timeout()
+            raise
+        except Exception:
+            # Opening an overflow connection failed (refused, bad credentials)
+            if self.metrics is not None:
+                self.metrics.record_connect_error()
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start)
+
+    def recreate(self):
+        # engine.dispose() swaps in a recreated pool; keep reporting to the same place
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def engine_options(config):
+    """Build SQLALCHEMY_ENGINE_OPTIONS from the DB_POOL_* settings.
+
+    SQLite keeps Flask-SQLAlchemy's own pool choice (in-memory databases
+    need a single shared connection), so only pre-ping and recycle apply.
+    """
+    options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    options.setdefault("pool_pre_ping", config.get("DB_POOL_PRE_PING", True))
+    options.setdefault("pool_recycle", config.get("DB_POOL_RECYCLE", 280))
+    uri = config.get("SQLALCHEMY_DATABASE_URI") or ""
+    if not uri.startswith("sqlite"):
+        options.setdefault("poolclass", TimedQueuePool)
+        options.setdefault("pool_size", config.get("DB_POOL_SIZE", 5))
+        options.setdefault("max_overflow", config.get("DB_MAX_OVERFLOW", 10))
+        options.setdefault("pool_timeout", config.get("DB_POOL_TIMEOUT", 30))
+    return options
+
+
+class PoolMetrics:
+    """Connection pool telemetry collected from SQLAlchemy pool events."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.engine = None
+        self.counters = {
+            "connects": 0,
+            "disconnects": 0,
+            "invalidations": 0,
+            "checkouts": 0,
+            "checkins": 0,
+            "timeouts": 0,
+            "connect_errors": 0,
+        }
+        self.wait_count = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def init_engine(self, engine):
+        self.engine = engine
+        if isinstance(engine.pool, TimedQueuePool):
+            engine.pool.metrics = self
+        # Listening on the engine keeps the listeners across pool recreation
+        event.listen(engine, "connect", lambda *a: self._count("connects"))
+        event.listen(engine, "close", lambda *a: self._count("disconnects"))
+        event.listen(engine, "close_detached", lambda *a: self._count("disconnects"))
+        event.listen(engine, "invalidate", lambda *a: self._count("invalidations"))
+        event.listen(engine, "checkout", lambda *a: self._count("checkouts"))
+        event.listen(engine, "checkin", lambda *a: self._count("checkins"))
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_timeout(self):
+        self._count("timeouts")
+
+    def record_connect_error(self):
+        self._count("connect_errors")
+
+    def snapshot(self):
+        pool = self.engine.pool
+        with self._lock:
+            data = dict(self.counters)
+            data["checkout_wait_ms_avg"] = (
+                self.wait_total / self.wait_count * 1000 if self.wait_count else 0.0
+            )
+            data["checkout_wait_ms_max"] = self.wait_max * 1000
+        data["pool_class"] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            data.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+            )
+        return data
+
+
+def init_pool_metrics(app):
+    """Attach a PoolMetrics to the app's engine (app.extensions["pool_metrics"])."""
+    metrics = PoolMetrics()
+    with app.app_context():
+        metrics.init_engine(db.engine)
+    app.extensions["pool_metrics"] = metrics
+    return metrics
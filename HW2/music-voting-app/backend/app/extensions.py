@@ -2,8 +2,10 @@ from flask_sqlalchemy import SQLAlchemy
 from flask_bcrypt import Bcrypt
 from flask_jwt_extended import JWTManager
 from flask_migrate import Migrate
+from .cache import ResponseCache
 
 db = SQLAlchemy()
 bcrypt = Bcrypt()
 jwt = JWTManager()
-migrate = Migrate()
\ No newline at end of file
+migrate = Migrate()
+cache = ResponseCache()
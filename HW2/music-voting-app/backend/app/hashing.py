@@ -0,0 +1,73 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .extensions import bcrypt
+
+
+class HashingBusy(RuntimeError):
+    """Raised when every hashing slot is taken; answer 503 with Retry-After."""
+
+    def __init__(self, retry_after):
+        super().__init__("Password hashing is at capacity")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Runs bcrypt on a small bounded thread pool.
+
+    bcrypt releases the GIL while hashing, so a thread pool gives real
+    parallelism without a process pool. At most PASSWORD_HASH_WORKERS hashes
+    run at once and PASSWORD_HASH_MAX_PENDING may be queued or running; a
+    request that cannot get a slot within PASSWORD_HASH_WAIT seconds gets
+    HashingBusy instead of tying up the worker. The cost factor is Flask-Bcrypt's
+    BCRYPT_LOG_ROUNDS.
+    """
+
+    def __init__(self, app=None):
+        self._executor = None
+        self._slots = None
+        self.wait = 0.05
+        self.retry_after = 1
+        self.rounds = 12  # Flask-Bcrypt's default cost
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        workers = app.config.get("PASSWORD_HASH_WORKERS", 4)
+        max_pending = app.config.get("PASSWORD_HASH_MAX_PENDING", workers * 2)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self.wait = app.config.get("PASSWORD_HASH_WAIT", 0.05)
+        self.retry_after = app.config.get("PASSWORD_HASH_RETRY_AFTER", 1)
+        self.rounds = app.config.get("BCRYPT_LOG_ROUNDS", self.rounds)
+        app.extensions["password_hasher"] = self
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            return fn(*args)
+        if not self._slots.acquire(timeout=self.wait):
+            raise HashingBusy(self.retry_after)
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self._run(bcrypt.generate_password_hash, password).decode("utf8")
+
+    def check(self, password_hash, password):
+        return self._run(bcrypt.check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """True if the hash was made with a different cost than BCRYPT_LOG_ROUNDS."""
+        # bcrypt hashes look like $2b$12$<salt+hash>
+        try:
+            rounds = int(password_hash.split("$")[2])
+        except (IndexError, ValueError):
+            return True
+        return rounds != self.rounds
+
+
+password_hasher = PasswordHasher()
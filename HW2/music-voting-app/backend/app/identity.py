@@ -0,0 +1,43 @@
+from collections import namedtuple
+from flask import current_app
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select
+from .cache import LRUCache
+from .extensions import jwt
+from .models import db, User
+
+# Read-only snapshot of the columns the routes need, safe to share across
+# requests (unlike an ORM instance bound to one session)
+CachedUser = namedtuple("CachedUser", ["id", "username", "is_admin"])
+
+user_cache = LRUCache()
+
+
+def init_identity(app):
+    user_cache.max_entries = app.config.get("USER_CACHE_MAX_ENTRIES", 4096)
+
+
+def current_user_id():
+    """The authenticated user's id, straight from the JWT (no query)."""
+    return int(get_jwt_identity())
+
+
+@jwt.user_lookup_loader
+def load_user(jwt_header, jwt_data):
+    """Resolve the token's subject for flask_jwt_extended.current_user.
+
+    flask_jwt_extended keeps the result for the rest of the request; this
+    adds a short process-level TTL cache on top so repeated requests from
+    the same user skip the primary-key SELECT.
+    """
+    user_id = int(jwt_data["sub"])
+    user = user_cache.get(user_id)
+    if user is None:
+        row = db.session.execute(
+            select(User.id, User.username, User.is_admin).where(User.id == user_id)
+        ).first()
+        if row is None:
+            return None
+        user = CachedUser(*row)
+        user_cache.set(user_id, user, current_app.config.get("USER_CACHE_TTL", 60))
+    return user
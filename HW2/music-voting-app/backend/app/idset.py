@@ -0,0 +1,26 @@
+"""Run-length encoding for sets of integer ids (GET /api/my-votes?format=rle).
+
+Sorted ids become [gap, run, gap, run, ...]: each run of consecutive ids
+is stored as the distance from the end of the previous run (starting at 0)
+and its length. {3, 4, 5, 9} encodes as [3, 3, 3, 1]. Votes on an album's
+tracks are usually consecutive song ids, so the list shrinks to a pair per
+album; scattered ids cost two numbers each, still small integers in JSON.
+"""
+
+
+def encode_runs(sorted_ids):
+    runs = []
+    previous_end = 0
+    start = None
+    last = None
+    for value in sorted_ids:
+        if start is not None and value == last + 1:
+            last = value
+            continue
+        if start is not None:
+            runs += [start - previous_end, last - start + 1]
+            previous_end = last + 1
+        start = last = value
+    if start is not None:
+        runs += [start - previous_end, last - start + 1]
+    return runs
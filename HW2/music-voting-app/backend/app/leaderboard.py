@@ -0,0 +1,162 @@
+import threading
+import time
+from bisect import bisect_left, insort
+from sqlalchemy import select
+from .models import db, Album, Song
+
+
+class RankedSet:
+    """Scores kept in a list sorted by (-score, id), so the top n is a slice."""
+
+    def __init__(self):
+        self._scores = {}
+        self._order = []
+
+    @classmethod
+    def from_items(cls, items):
+        """Build from (key, score) pairs with one sort, not one insort per key."""
+        ranked = cls()
+        ranked._scores = dict(items)
+        ranked._order = sorted((-score, key) for key, score in ranked._scores.items())
+        return ranked
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, key):
+        return key in self._scores
+
+    def set(self, key, score):
+        self.discard(key)
+        self._scores[key] = score
+        insort(self._order, (-score, key))
+
+    def discard(self, key):
+        score = self._scores.pop(key, None)
+        if score is not None:
+            del self._order[bisect_left(self._order, (-score, key))]
+
+    def top(self, n):
+        return [(key, -neg_score) for neg_score, key in self._order[:n]]
+
+
+class Leaderboard:
+    """In-memory album and per-album song rankings by vote count.
+
+    Built from the vote_count columns on first use and kept current by the
+    write paths in this process. Each gunicorn worker holds its own copy, so
+    it is also rebuilt every LEADERBOARD_REFRESH_SECONDS to pick up votes
+    handled by the other workers.
+    """
+
+    def __init__(self, app=None):
+        self.refresh_seconds = 60
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._albums = RankedSet()
+        self._songs = {}
+        self._song_album = {}
+        self._built_at = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.refresh_seconds = app.config.get("LEADERBOARD_REFRESH_SECONDS", 60)
+        app.extensions["leaderboard"] = self
+
+    def rebuild(self):
+        album_rows = db.session.execute(select(Album.id, Album.vote_count)).all()
+        song_rows = {album_id: [] for album_id, _ in album_rows}
+        song_album = {}
+        for song_id, album_id, vote_count in db.session.execute(
+            select(Song.id, Song.album_id, Song.vote_count)
+        ):
+            song_rows.setdefault(album_id, []).append((song_id, vote_count))
+            song_album[song_id] = album_id
+        albums = RankedSet.from_items(album_rows)
+        songs = {album_id: RankedSet.from_items(rows) for album_id, rows in song_rows.items()}
+        with self._lock:
+            self._albums, self._songs, self._song_album = albums, songs, song_album
+            self._built_at = time.monotonic()
+
+    def reset(self):
+        """Drop the rankings so the next read rebuilds them (after bulk writes)."""
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_built(self):
+        """Rebuild when missing or stale; only one thread rebuilds at a time.
+
+        While a stale snapshot is being refreshed, other readers keep using
+        it; only a missing one (first use, after reset()) makes them wait.
+        """
+        if not self._stale():
+            return
+        if self._built_at is None:
+            self._rebuild_lock.acquire()
+        elif not self._rebuild_lock.acquire(blocking=False):
+            return
+        try:
+            if self._stale():  # another thread may have just rebuilt
+                self.rebuild()
+        finally:
+            self._rebuild_lock.release()
+
+    def _stale(self):
+        built_at = self._built_at
+        return built_at is None or time.monotonic() - built_at > self.refresh_seconds
+
+    # --- Incremental updates from the write paths ---------------------------
+
+    def update(self, kind, target_id, vote_count):
+        with self._lock:
+            if self._built_at is None:
+                return
+            if kind == "album":
+                if target_id in self._albums:
+                    self._albums.set(target_id, vote_count)
+            else:
+                album_id = self._song_album.get(target_id)
+                if album_id is not None:
+                    self._songs[album_id].set(target_id, vote_count)
+
+    def add_album(self, album_id):
+        with self._lock:
+            if self._built_at is not None:
+                self._albums.set(album_id, 0)
+                self._songs[album_id] = RankedSet()
+
+    def add_song(self, song_id, album_id):
+        with self._lock:
+            if self._built_at is not None and album_id in self._songs:
+                self._songs[album_id].set(song_id, 0)
+                self._song_album[song_id] = album_id
+
+    def remove_album(self, album_id):
+        with self._lock:
+            self._albums.discard(album_id)
+            for song_id, _ in self._songs.pop(album_id, RankedSet()).top(None):
+                self._song_album.pop(song_id, None)
+
+    def remove_song(self, song_id):
+        with self._lock:
+            album_id = self._song_album.pop(song_id, None)
+            if album_id is not None:
+                self._songs[album_id].discard(song_id)
+
+    # --- Reads ----------------------------------------------------------------
+
+    def top_albums(self, n):
+        self._ensure_built()
+        with self._lock:
+            return self._albums.top(n)
+
+    def top_songs(self, album_id, n):
+        """Top n songs of an album, or None if the album is unknown."""
+        self._ensure_built()
+        with self._lock:
+            songs = self._songs.get(album_id)
+            return None if songs is None else songs.top(n)
+
+
+leaderboard = Leaderboard()
@@ -0,0 +1,117 @@
+import json
+import threading
+import time
+
+
+class Subscriber:
+    """One stream client: pending counts keyed by (type, id), latest value wins."""
+
+    def __init__(self, album_id=None):
+        self.album_id = album_id
+        self.pending = {}
+        self.dropped = False
+        self.wake = threading.Event()
+
+    def wants(self, event):
+        if self.album_id is None:
+            return event["type"] == "album"
+        if event["type"] == "album":
+            return event["id"] == self.album_id
+        return event.get("album_id") == self.album_id
+
+
+class VoteStream:
+    """In-process pub/sub feeding GET /api/live/votes (server-sent events).
+
+    votes_committed() publishes every committed count change; each client
+    keeps only the latest count per album/song it watches, so a burst of
+    votes on one target costs one update. Updates are flushed to the client
+    at most every LIVE_VOTES_INTERVAL seconds. A client that falls
+    LIVE_VOTES_BUFFER distinct targets behind is dropped; EventSource
+    reconnects and the page reloads its counts. Each gunicorn worker only
+    sees the votes it handles itself (or flushes from its write-behind queue).
+    Every client occupies a request thread while connected, so this needs a
+    threaded or gevent worker class (see LIVE_VOTES_MAX_CLIENTS in config.py).
+    """
+
+    def __init__(self, app=None):
+        self.buffer_size = 256
+        self.interval = 0.5
+        self.heartbeat = 15
+        self.max_clients = 24
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.metrics = {"published": 0, "dropped_clients": 0}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.buffer_size = app.config.get("LIVE_VOTES_BUFFER", 256)
+        self.interval = app.config.get("LIVE_VOTES_INTERVAL", 0.5)
+        self.heartbeat = app.config.get("LIVE_VOTES_HEARTBEAT", 15)
+        self.max_clients = app.config.get("LIVE_VOTES_MAX_CLIENTS", 24)
+        app.extensions["vote_stream"] = self
+
+    def subscribe(self, album_id=None):
+        """Register a client, or return None when LIVE_VOTES_MAX_CLIENTS are connected."""
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscriber = Subscriber(album_id)
+            self._subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, events):
+        """Queue {"type", "id", "vote_count", "album_id"?} updates for every watcher."""
+        if not events:
+            return
+        with self._lock:
+            self.metrics["published"] += len(events)
+            for subscriber in list(self._subscribers):
+                for event in events:
+                    if not subscriber.wants(event):
+                        continue
+                    key = (event["type"], event["id"])
+                    if key not in subscriber.pending and len(subscriber.pending) >= self.buffer_size:
+                        subscriber.dropped = True
+                        self._subscribers.discard(subscriber)
+                        self.metrics["dropped_clients"] += 1
+                        break
+                    subscriber.pending[key] = event
+                subscriber.wake.set()
+
+    def _take(self, subscriber):
+        with self._lock:
+            events, subscriber.pending = list(subscriber.pending.values()), {}
+            subscriber.wake.clear()
+            return events
+
+    def stream(self, subscriber):
+        """Yield SSE frames for the subscriber until it disconnects or is dropped."""
+        try:
+            yield f"retry: {int(self.heartbeat * 1000)}\n\n"
+            while True:
+                if not subscriber.wake.wait(self.heartbeat):
+                    yield ": keep-alive\n\n"
+                    continue
+                # Let a burst of votes land in the same frame
+                time.sleep(self.interval)
+                if subscriber.dropped:
+                    yield "event: dropped\ndata: {}\n\n"
+                    return
+                events = self._take(subscriber)
+                if events:
+                    yield f"event: votes\ndata: {json.dumps(events)}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            return dict(self.metrics, clients=len(self._subscribers))
+
+
+vote_stream = VoteStream()
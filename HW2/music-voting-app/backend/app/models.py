@@ -1,14 +1,19 @@
-from .extensions import db, bcrypt
+from sqlalchemy.exc import IntegrityError
+from .extensions import db
+from .hashing import password_hasher
 
 # Association tables for many-to-many relationship (User <-> Vote)
 album_votes = db.Table('album_votes',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('album_id', db.Integer, db.ForeignKey('album.id'), primary_key=True)
+    db.Column('album_id', db.Integer, db.ForeignKey('album.id', ondelete='CASCADE'), primary_key=True),
+    # The primary key leads with user_id; this serves lookups by album
+    db.Index('ix_album_votes_album_id_user_id', 'album_id', 'user_id')
 )
 
 song_votes = db.Table('song_votes',
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True),
-    db.Column('song_id', db.Integer, db.ForeignKey('song.id'), primary_key=True)
+    db.Column('song_id', db.Integer, db.ForeignKey('song.id', ondelete='CASCADE'), primary_key=True),
+    db.Index('ix_song_votes_song_id_user_id', 'song_id', 'user_id')
 )
 
 class User(db.Model):
@@ -20,22 +25,107 @@ class User(db.Model):
     voted_albums = db.relationship('Album', secondary=album_votes, back_populates='voters')
     voted_songs = db.relationship('Song', secondary=song_votes, back_populates='voters')
 
+    # Hashing runs on the bounded bcrypt pool and may raise HashingBusy
     def set_password(self, password):
-        self.password_hash = bcrypt.generate_password_hash(password).decode('utf8')
+        self.password_hash = password_hasher.hash(password)
 
     def check_password(self, password):
-        return bcrypt.check_password_hash(self.password_hash, password)
+        return password_hasher.check(self.password_hash, password)
+
+    def password_needs_rehash(self):
+        return password_hasher.needs_rehash(self.password_hash)
 
 class Album(db.Model):
+    # Covering indexes for the keyset-paginated listing sorts (id breaks ties)
+    __table_args__ = (
+        db.Index('ix_album_title_id', 'title', 'id'),
+        db.Index('ix_album_artist_id', 'artist', 'id'),
+        db.Index('ix_album_vote_count_id', 'vote_count', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(120), nullable=False)
     artist = db.Column(db.String(120), nullable=False)
     cover_image_url = db.Column(db.String(255))
-    songs = db.relationship('Song', backref='album', lazy=True, cascade="all, delete-orphan")
-    voters = db.relationship('User', secondary=album_votes, back_populates='voted_albums')
+    # Denormalized count of album_votes rows, maintained by the vote routes
+    vote_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    # The database cascades deletes (ON DELETE CASCADE); passive_deletes keeps
+    # the ORM from loading songs and voters just to delete them
+    songs = db.relationship('Song', backref='album', lazy=True, cascade="all, delete-orphan",
+                            passive_deletes=True, order_by='Song.id')
+    voters = db.relationship('User', secondary=album_votes, back_populates='voted_albums',
+                             passive_deletes=True)
 
 class Song(db.Model):
+    __table_args__ = (
+        db.Index('ix_song_album_id_id', 'album_id', 'id'),
+        db.Index('ix_song_album_id_title_id', 'album_id', 'title', 'id'),
+        db.Index('ix_song_album_id_vote_count_id', 'album_id', 'vote_count', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(120), nullable=False)
-    album_id = db.Column(db.Integer, db.ForeignKey('album.id'), nullable=False)
-    voters = db.relationship('User', secondary=song_votes, back_populates='voted_songs')
\ No newline at end of file
+    album_id = db.Column(db.Integer, db.ForeignKey('album.id', ondelete='CASCADE'), nullable=False)
+    # Denormalized count of song_votes rows, maintained by the vote routes
+    vote_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    voters = db.relationship('User', secondary=song_votes, back_populates='voted_songs',
+                             passive_deletes=True)
+
+class AppState(db.Model):
+    """Single-row table for persisted application flags."""
+    __tablename__ = 'app_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    admin_claimed = db.Column(db.Boolean, default=False, server_default=db.false(), nullable=False)
+
+    # Once the first admin exists this never changes back, so remember it per
+    # process (keyed by database, in case one process serves several)
+    _admin_claimed_in = set()
+
+    @classmethod
+    def claim_first_admin(cls):
+        """Return True for exactly one caller: the user who becomes the first admin.
+
+        Uses a conditional UPDATE on the flag row, so concurrent signups cannot
+        both win. Runs in the caller's transaction; if the signup is rolled
+        back, so is the claim.
+        """
+        database = db.engine.url.render_as_string()
+        if database in cls._admin_claimed_in:
+            return False
+        claimed = db.session.execute(
+            db.select(cls.admin_claimed).where(cls.id == 1)
+        ).scalar()
+        if claimed is None:
+            # Schema made with db.create_all() instead of the migration
+            has_admin = db.session.execute(
+                db.select(User.id).where(User.is_admin.is_(True)).limit(1)
+            ).first() is not None
+            try:
+                with db.session.begin_nested():
+                    db.session.add(cls(id=1, admin_claimed=has_admin))
+            except IntegrityError:
+                pass
+        elif claimed:
+            cls._admin_claimed_in.add(database)
+            return False
+        won = db.session.execute(
+            db.update(cls)
+            .where(cls.id == 1, cls.admin_claimed.is_(False))
+            .values(admin_claimed=True)
+        ).rowcount
+        return bool(won)
+
+class ArtistStats(db.Model):
+    """Per-artist totals, kept current by the write paths (see artist_stats.py)."""
+    __tablename__ = 'artist_stats'
+    __table_args__ = (
+        db.Index('ix_artist_stats_album_votes_artist', 'album_votes', 'artist'),
+        db.Index('ix_artist_stats_song_votes_artist', 'song_votes', 'artist'),
+    )
+
+    artist = db.Column(db.String(120), primary_key=True)
+    album_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    song_count = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    album_votes = db.Column(db.Integer, default=0, server_default='0', nullable=False)
+    song_votes = db.Column(db.Integer, default=0, server_default='0', nullable=False)
@@ -0,0 +1,99 @@
+import base64
+import json
+from flask import current_app, request
+from sqlalchemy import and_, or_
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode("utf8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise PaginationError("Invalid cursor")
+    last_value, last_id = values
+    # Sort values are titles, artists or counts; ids are integers
+    if (
+        not isinstance(last_id, int)
+        or isinstance(last_id, bool)
+        or not (last_value is None or isinstance(last_value, (str, int)))
+        or isinstance(last_value, bool)
+    ):
+        raise PaginationError("Invalid cursor")
+    return values
+
+
+def prefix_filter(column, prefix):
+    """LIKE 'prefix%' with wildcards in the user input escaped."""
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.like(escaped + "%", escape="\\")
+
+
+def keyset_paginate(query, sort_columns, id_column):
+    """Apply ?sort=, ?cursor= and ?limit= from the request to a query.
+
+    sort_columns maps the public sort names to columns; prefix a name with
+    "-" to sort descending. The id column breaks ties, so the cursor is the
+    (sort value, id) pair of the last row returned. Returns the rows and the
+    cursor for the next page (None on the last page).
+    """
+    sort = request.args.get("sort", "id")
+    descending = sort.startswith("-")
+    sort_name = sort.lstrip("-")
+    if sort_name == "id":
+        sort_column = id_column
+    elif sort_name in sort_columns:
+        sort_column = sort_columns[sort_name]
+    else:
+        raise PaginationError(f"Cannot sort by '{sort_name}'")
+
+    try:
+        limit = int(request.args.get("limit", current_app.config["DEFAULT_PAGE_SIZE"]))
+    except ValueError:
+        raise PaginationError("limit must be an integer")
+    limit = max(1, min(limit, current_app.config["MAX_PAGE_SIZE"]))
+
+    cursor = request.args.get("cursor")
+    if cursor:
+        last_value, last_id = decode_cursor(cursor)
+        if sort_column is id_column:
+            # Plain range on the key, which the primary key index can seek to
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        elif descending:
+            query = query.filter(
+                or_(
+                    sort_column < last_value,
+                    and_(sort_column == last_value, id_column < last_id),
+                )
+            )
+        else:
+            query = query.filter(
+                or_(
+                    sort_column > last_value,
+                    and_(sort_column == last_value, id_column > last_id),
+                )
+            )
+
+    order = [sort_column] if sort_column is id_column else [sort_column, id_column]
+    query = query.order_by(*(c.desc() if descending else c.asc() for c in order))
+
+    # Fetch one extra row to know whether another page exists
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(
+            [getattr(last, sort_column.key), getattr(last, id_column.key)]
+        )
+    return rows, next_cursor
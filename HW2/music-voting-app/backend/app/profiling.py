@@ -0,0 +1,138 @@
+import threading
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from .extensions import db
+
+
+class QueryStats:
+    """Statement count and database time for one request or one block."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements = []
+        # (statement, parameters, executemany), e.g. for re-running under EXPLAIN
+        self.queries = []
+
+    @property
+    def ms(self):
+        return self.seconds * 1000
+
+    def record(self, statement, seconds, parameters=None, executemany=False):
+        self.count += 1
+        self.seconds += seconds
+        self.statements.append(statement)
+        self.queries.append((statement, parameters, executemany))
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryProfiler:
+    """Counts SQL statements and DB time per request.
+
+    Every response gets a Server-Timing header ("db" with the statement
+    count, "app" for the whole request), and requests over QUERY_BUDGET_COUNT
+    statements or QUERY_BUDGET_MS milliseconds are logged with their
+    statements, which is usually enough to spot an N+1 loop. Tests can wrap
+    calls in count_queries() or query_budget(n) to pin an endpoint's cost.
+    Statements issued outside a request (the vote flusher, CLI commands) are
+    only seen by an active count_queries() block.
+    """
+
+    def __init__(self, app=None):
+        self.enabled = True
+        self.max_queries = 20
+        self.max_ms = 500
+        self._collectors = []
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get("QUERY_PROFILING", True)
+        self.max_queries = app.config.get("QUERY_BUDGET_COUNT", 20)
+        self.max_ms = app.config.get("QUERY_BUDGET_MS", 500)
+        app.extensions["query_profiler"] = self
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", self._before_execute)
+            event.listen(db.engine, "after_cursor_execute", self._after_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    # --- Engine events -----------------------------------------------------
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        if has_request_context():
+            stats = g.get("query_stats")
+            if stats is not None:
+                stats.record(statement, elapsed)
+        if self._collectors:
+            with self._lock:
+                for stats in self._collectors:
+                    stats.record(statement, elapsed, parameters, executemany)
+
+    # --- Request hooks -----------------------------------------------------
+
+    def _start_request(self):
+        if self.enabled:
+            g.query_stats = QueryStats()
+            g.request_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        stats = g.get("query_stats")
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - g.request_started) * 1000
+        response.headers.add(
+            "Server-Timing", f'db;dur={stats.ms:.1f};desc="{stats.count} queries"'
+        )
+        response.headers.add("Server-Timing", f"app;dur={total_ms:.1f}")
+        if stats.count > self.max_queries or total_ms > self.max_ms:
+            current_app.logger.warning(
+                "Over budget: %s %s ran %d queries (%.1f ms in DB, %.1f ms total)\n%s",
+                request.method,
+                request.full_path,
+                stats.count,
+                stats.ms,
+                total_ms,
+                "\n".join(stats.statements),
+            )
+        return response
+
+    # --- Test helpers ------------------------------------------------------
+
+    @contextmanager
+    def count_queries(self):
+        """Collect every statement run inside the block, in any thread."""
+        stats = QueryStats()
+        with self._lock:
+            self._collectors.append(stats)
+        try:
+            yield stats
+        finally:
+            with self._lock:
+                self._collectors.remove(stats)
+
+    @contextmanager
+    def query_budget(self, max_queries):
+        """Fail with QueryBudgetExceeded if the block runs more than max_queries."""
+        with self.count_queries() as stats:
+            yield stats
+        if stats.count > max_queries:
+            raise QueryBudgetExceeded(
+                f"{stats.count} queries, budget {max_queries}:\n" + "\n".join(stats.statements)
+            )
+
+
+query_profiler = QueryProfiler()
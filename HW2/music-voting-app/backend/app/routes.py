@@ -1,13 +1,34 @@
-from flask import Blueprint, request, jsonify
-from .models import db, User, Album, Song
-from .extensions import bcrypt
+from flask import Blueprint, Response, current_app, request, jsonify
+from .models import db, AppState, ArtistStats, User, Album, Song, album_votes, song_votes
+from .artist_stats import album_totals, bump_artist, drop_empty_artist, move_album
+from .votes import (
+    MY_VOTES_TAG,
+    VOTE_TARGETS,
+    TargetNotFound,
+    apply_vote_batch,
+    peek_vote,
+    toggle_vote,
+    votes_committed,
+)
+from .vote_queue import vote_queue
+from .identity import current_user_id
+from .hashing import HashingBusy
+from .catalog_import import CatalogImportError, detect_format, import_catalog
+from .leaderboard import leaderboard
+from .live import vote_stream
+from .idset import encode_runs
+from .pagination import PaginationError, keyset_paginate, prefix_filter
+from sqlalchemy import delete, func, select
+from sqlalchemy.exc import IntegrityError
+from .extensions import cache
 from flask_jwt_extended import (
     create_access_token,
+    current_user,
     jwt_required,
-    get_jwt_identity,
     get_jwt,
 )
 from functools import wraps
+import io
 
 main = Blueprint("main", __name__)
 
@@ -29,6 +50,13 @@ def admin_required():
     return wrapper
 
 
+@main.errorhandler(HashingBusy)
+def hashing_busy(e):
+    response = jsonify({"msg": "Server is busy, please try again shortly."})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 503
+
+
 @main.route("/register", methods=["POST"])
 def register():
     try:
@@ -39,19 +67,23 @@ def register():
         if not username or not password:
             return jsonify({"msg": "Username and password are required"}), 400
 
-        if User.query.filter_by(username=username).first():
-            return jsonify({"msg": "Username already exists"}), 409
-
-        # First registered user becomes an admin
-        is_first_user = User.query.count() == 0
-        new_user = User(username=username, is_admin=is_first_user)
+        new_user = User(username=username)
         new_user.set_password(password)
 
+        # First registered user becomes an admin
+        new_user.is_admin = AppState.claim_first_admin()
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            # The unique constraint on username rejects duplicates
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return jsonify({"msg": "Username already exists"}), 409
 
         return jsonify({"msg": "User created successfully"}), 201
 
+    except HashingBusy:
+        raise
     except Exception as e:
         # If any error happens, print it to the Flask terminal
         print(f"An error occurred in the register route: {e}")
@@ -70,6 +102,13 @@ def login():
     user = User.query.filter_by(username=username).first()
 
     if user and user.check_password(password):
+        # Upgrade hashes made with an older BCRYPT_LOG_ROUNDS while we have the password
+        if user.password_needs_rehash():
+            try:
+                user.set_password(password)
+                db.session.commit()
+            except HashingBusy:
+                pass  # try again on a later login
         additional_claims = {"is_admin": user.is_admin}
         access_token = create_access_token(
             identity=str(user.id), additional_claims=additional_claims
@@ -85,9 +124,9 @@ def login():
 @main.route("/profile")
 @jwt_required()
 def profile():
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    return jsonify(id=user.id, username=user.username, isAdmin=user.is_admin), 200
+    return jsonify(
+        id=current_user.id, username=current_user.username, isAdmin=current_user.is_admin
+    ), 200
 
 
 @main.route("/albums", methods=["POST"])
@@ -100,7 +139,10 @@ def add_album():
         cover_image_url=data.get("cover_image_url"),
     )
     db.session.add(new_album)
+    bump_artist(new_album.artist, album_count=1)
     db.session.commit()
+    cache.invalidate("albums")
+    leaderboard.add_album(new_album.id)
     return jsonify({"msg": "Album added successfully", "id": new_album.id}), 201
 
 
@@ -110,13 +152,40 @@ def add_song(album_id):
     data = request.get_json()
     new_song = Song(title=data["title"], album_id=album_id)
     db.session.add(new_song)
+    artist = db.session.execute(select(Album.artist).where(Album.id == album_id)).scalar()
+    if artist is not None:
+        bump_artist(artist, song_count=1)
     db.session.commit()
+    cache.invalidate(f"album:{album_id}", f"album:{album_id}:songs")
+    leaderboard.add_song(new_song.id, album_id)
     return jsonify({"msg": "Song added successfully", "id": new_song.id}), 201
 
 
+def _paginated_response(output, next_cursor):
+    response = jsonify(output)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
 @main.route("/albums", methods=["GET"])
+@cache.cached(lambda: "albums")
 def get_albums():
-    albums = Album.query.all()
+    query = Album.query
+    if request.args.get("artist"):
+        query = query.filter(prefix_filter(Album.artist, request.args["artist"]))
+    if request.args.get("title"):
+        query = query.filter(prefix_filter(Album.title, request.args["title"]))
+
+    try:
+        albums, next_cursor = keyset_paginate(
+            query,
+            {"title": Album.title, "artist": Album.artist, "vote_count": Album.vote_count},
+            Album.id,
+        )
+    except PaginationError as e:
+        return jsonify({"msg": str(e)}), 400
+
     output = []
     for album in albums:
         album_data = {
@@ -124,77 +193,379 @@ def get_albums():
             "title": album.title,
             "artist": album.artist,
             "cover_image_url": album.cover_image_url,
-            "vote_count": len(album.voters),
+            "vote_count": album.vote_count,
         }
         output.append(album_data)
-    return jsonify(output)
+    return _paginated_response(output, next_cursor)
 
 
 @main.route("/albums/<int:album_id>/songs", methods=["GET"])
+@cache.cached(lambda album_id: f"album:{album_id}:songs")
 def get_songs(album_id):
-    songs = Song.query.filter_by(album_id=album_id).all()
+    query = Song.query.filter_by(album_id=album_id)
+    if request.args.get("title"):
+        query = query.filter(prefix_filter(Song.title, request.args["title"]))
+
+    try:
+        songs, next_cursor = keyset_paginate(
+            query, {"title": Song.title, "vote_count": Song.vote_count}, Song.id
+        )
+    except PaginationError as e:
+        return jsonify({"msg": str(e)}), 400
+
     output = []
     for song in songs:
         song_data = {
             "id": song.id,
             "title": song.title,
             "album_id": song.album_id,
-            "vote_count": len(song.voters),
+            "vote_count": song.vote_count,
         }
         output.append(song_data)
+    return _paginated_response(output, next_cursor)
+
+
+CATALOG_ALBUM_FIELDS = ("id", "title", "artist", "cover_image_url", "vote_count", "song_count")
+CATALOG_SONG_FIELDS = ("id", "title", "vote_count")
+
+
+def _parse_fields(param, allowed):
+    """Parse a comma-separated field list, returning None if it has unknown names."""
+    raw = request.args.get(param)
+    if not raw:
+        return list(allowed)
+    fields = [f.strip() for f in raw.split(",") if f.strip()]
+    if any(f not in allowed for f in fields):
+        return None
+    return fields
+
+
+# GET every album (optionally with its songs) in a fixed number of queries
+@main.route("/catalog", methods=["GET"])
+def get_catalog():
+    album_fields = _parse_fields("fields", CATALOG_ALBUM_FIELDS)
+    song_fields = _parse_fields("song_fields", CATALOG_SONG_FIELDS)
+    if album_fields is None or song_fields is None:
+        return jsonify({"msg": "Unknown field requested"}), 400
+    include = {i.strip() for i in request.args.get("include", "").split(",")}
+
+    # Query 1: albums with their song count from a grouped subquery
+    song_counts = (
+        db.session.query(Song.album_id, func.count(Song.id).label("song_count"))
+        .group_by(Song.album_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(
+            Album.id,
+            Album.title,
+            Album.artist,
+            Album.cover_image_url,
+            Album.vote_count,
+            func.coalesce(song_counts.c.song_count, 0).label("song_count"),
+        )
+        .outerjoin(song_counts, song_counts.c.album_id == Album.id)
+        .order_by(Album.id)
+        .all()
+    )
+    output = [{f: getattr(row, f) for f in album_fields} for row in rows]
+
+    # Query 2: every song, attached to its album in Python
+    if "songs" in include:
+        songs_by_album = {row.id: [] for row in rows}
+        songs = (
+            db.session.query(Song.id, Song.title, Song.vote_count, Song.album_id)
+            .order_by(Song.album_id, Song.id)
+            .all()
+        )
+        for song in songs:
+            if song.album_id in songs_by_album:
+                songs_by_album[song.album_id].append(
+                    {f: getattr(song, f) for f in song_fields}
+                )
+        for row, album_data in zip(rows, output):
+            album_data["songs"] = songs_by_album[row.id]
+
     return jsonify(output)
 
 
+def _queued_vote_response(kind, target_id):
+    """Acknowledge a vote from the write-behind queue (VOTE_WRITE_BEHIND)."""
+    user_id = current_user_id()
+    try:
+        stored_voted, vote_count = peek_vote(kind, user_id, target_id)
+    except TargetNotFound as e:
+        return jsonify({"msg": str(e)}), 404
+    flip = vote_queue.enqueue(user_id, kind, target_id)
+
+    # Expected state once flushed; other users' queued votes are not counted
+    voted = stored_voted != flip
+    vote_count += int(voted) - int(stored_voted)
+    return jsonify(
+        {
+            "msg": "Voted successfully" if voted else "Vote removed",
+            "voted": voted,
+            "vote_count": vote_count,
+            "queued": True,
+        }
+    ), 202
+
+
+def _vote_response(kind, target_id):
+    if vote_queue.enabled:
+        return _queued_vote_response(kind, target_id)
+    try:
+        voted, vote_count = toggle_vote(kind, current_user_id(), target_id)
+    except TargetNotFound as e:
+        db.session.rollback()
+        return jsonify({"msg": str(e)}), 404
+    db.session.commit()
+    votes_committed(
+        [{"type": kind, "id": target_id, "voted": voted, "vote_count": vote_count}],
+        [current_user_id()],
+    )
+    return jsonify(
+        {
+            "msg": "Voted successfully" if voted else "Vote removed",
+            "voted": voted,
+            "vote_count": vote_count,
+        }
+    ), 200
+
+
 @main.route("/vote/album/<int:album_id>", methods=["POST"])
 @jwt_required()
 def vote_album(album_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    album = Album.query.get(album_id)
-
-    if not album:
-        return jsonify({"msg": "Album not found"}), 404
-
-    if album in user.voted_albums:
-        # User is retrieving/changing their vote, so we remove it
-        user.voted_albums.remove(album)
-        db.session.commit()
-        return jsonify({"msg": "Vote removed"}), 200
-    else:
-        # Add new vote
-        user.voted_albums.append(album)
-        db.session.commit()
-        return jsonify({"msg": "Voted successfully"}), 200
+    return _vote_response("album", album_id)
 
 
 @main.route("/vote/song/<int:song_id>", methods=["POST"])
 @jwt_required()
 def vote_song(song_id):
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    song = Song.query.get(song_id)
+    return _vote_response("song", song_id)
 
-    if not song:
-        return jsonify({"msg": "Song not found"}), 404
 
-    if song in user.voted_songs:
-        user.voted_songs.remove(song)
-        db.session.commit()
-        return jsonify({"msg": "Vote removed"}), 200
-    else:
-        user.voted_songs.append(song)
-        db.session.commit()
-        return jsonify({"msg": "Voted successfully"}), 200
+# Apply many album/song vote toggles from one user in a single transaction
+@main.route("/vote/batch", methods=["POST"])
+@jwt_required()
+def vote_batch():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"msg": "Expected a JSON object with a votes list"}), 400
+    votes = data.get("votes")
+    if not isinstance(votes, list) or not votes:
+        return jsonify({"msg": "votes must be a non-empty list"}), 400
+    if len(votes) > current_app.config["MAX_VOTE_BATCH"]:
+        return jsonify({"msg": "Too many votes in one batch"}), 400
+
+    items = []
+    for vote in votes:
+        if (
+            not isinstance(vote, dict)
+            or vote.get("type") not in VOTE_TARGETS
+            or not isinstance(vote.get("id"), int)
+            or isinstance(vote.get("id"), bool)
+        ):
+            return jsonify({"msg": "Each vote needs a type (album/song) and an integer id"}), 400
+        items.append((vote["type"], vote["id"]))
+
+    results = apply_vote_batch(current_user_id(), items)
+    db.session.commit()
+    votes_committed(results, [current_user_id()])
+    return jsonify({"results": results}), 200
 
 
+# GET the ids the user voted for; ?format=rle returns them run-length
+# encoded (see idset.py). Cached per user until they vote again.
 @main.route("/my-votes", methods=["GET"])
 @jwt_required()
+@cache.cached(lambda: (f"user:{current_user_id()}:votes", MY_VOTES_TAG))
 def my_votes():
-    user_id = get_jwt_identity()
-    user = User.query.get(user_id)
-    voted_album_ids = [album.id for album in user.voted_albums]
-    voted_song_ids = [song.id for song in user.voted_songs]
-    return jsonify({"voted_albums": voted_album_ids, "voted_songs": voted_song_ids})
+    user_id = current_user_id()
+    voted_album_ids = db.session.execute(
+        select(album_votes.c.album_id)
+        .where(album_votes.c.user_id == user_id)
+        .order_by(album_votes.c.album_id)
+    ).scalars().all()
+    voted_song_ids = db.session.execute(
+        select(song_votes.c.song_id)
+        .where(song_votes.c.user_id == user_id)
+        .order_by(song_votes.c.song_id)
+    ).scalars().all()
+    if request.args.get("format") == "rle":
+        response = jsonify(
+            {
+                "encoding": "rle",
+                "voted_albums": encode_runs(voted_album_ids),
+                "voted_songs": encode_runs(voted_song_ids),
+            }
+        )
+    else:
+        response = jsonify({"voted_albums": voted_album_ids, "voted_songs": voted_song_ids})
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _leaderboard_limit():
+    try:
+        limit = int(request.args.get("limit", 10))
+    except ValueError:
+        limit = 10
+    return max(1, min(limit, current_app.config["LEADERBOARD_MAX_LIMIT"]))
+
+
+# GET the most voted albums
+@main.route("/leaderboard/albums", methods=["GET"])
+def album_leaderboard():
+    top = leaderboard.top_albums(_leaderboard_limit())
+    albums = {
+        row.id: row
+        for row in db.session.execute(
+            select(Album.id, Album.title, Album.artist, Album.cover_image_url).where(
+                Album.id.in_([album_id for album_id, _ in top])
+            )
+        )
+    }
+    output = []
+    for album_id, vote_count in top:
+        album = albums.get(album_id)
+        if album is None:
+            continue  # deleted by another worker since the last rebuild
+        output.append(
+            {
+                "rank": len(output) + 1,
+                "id": album_id,
+                "title": album.title,
+                "artist": album.artist,
+                "cover_image_url": album.cover_image_url,
+                "vote_count": vote_count,
+            }
+        )
+    return jsonify(output)
+
+
+# GET the most voted songs of one album
+@main.route("/albums/<int:album_id>/leaderboard", methods=["GET"])
+def song_leaderboard(album_id):
+    top = leaderboard.top_songs(album_id, _leaderboard_limit())
+    if top is None:
+        return jsonify({"msg": "Album not found"}), 404
+    titles = dict(
+        db.session.execute(
+            select(Song.id, Song.title).where(Song.id.in_([song_id for song_id, _ in top]))
+        ).all()
+    )
+    output = []
+    for song_id, vote_count in top:
+        if song_id in titles:
+            output.append(
+                {
+                    "rank": len(output) + 1,
+                    "id": song_id,
+                    "title": titles[song_id],
+                    "vote_count": vote_count,
+                }
+            )
+    return jsonify(output)
+
+
+@main.route("/vote-queue/stats", methods=["GET"])
+@admin_required()
+def vote_queue_stats():
+    return jsonify(vote_queue.stats()), 200
+
+
+# GET per-artist totals (album/song counts and votes), keyset paginated;
+# ?sort=-album_votes lists the most voted artists first
+@main.route("/artists/stats", methods=["GET"])
+def get_artist_stats():
+    try:
+        rows, next_cursor = keyset_paginate(
+            ArtistStats.query,
+            {
+                "artist": ArtistStats.artist,
+                "album_count": ArtistStats.album_count,
+                "song_count": ArtistStats.song_count,
+                "album_votes": ArtistStats.album_votes,
+                "song_votes": ArtistStats.song_votes,
+            },
+            ArtistStats.artist,
+        )
+    except PaginationError as e:
+        return jsonify({"msg": str(e)}), 400
+    return _paginated_response([_artist_stats_dict(row) for row in rows], next_cursor)
+
+
+@main.route("/artists/stats/<path:artist>", methods=["GET"])
+def get_one_artist_stats(artist):
+    row = db.session.get(ArtistStats, artist)
+    if row is None:
+        return jsonify({"msg": "Artist not found"}), 404
+    return jsonify(_artist_stats_dict(row)), 200
+
+
+def _artist_stats_dict(row):
+    return {
+        "artist": row.artist,
+        "album_count": row.album_count,
+        "song_count": row.song_count,
+        "album_votes": row.album_votes,
+        "song_votes": row.song_votes,
+    }
+
+
+# Process-level runtime metrics (connection pool, live vote stream)
+@main.route("/metrics", methods=["GET"])
+@admin_required()
+def metrics():
+    return jsonify(
+        {
+            "pool": current_app.extensions["pool_metrics"].snapshot(),
+            "live_votes": vote_stream.stats(),
+        }
+    ), 200
+
+
+# Server-sent vote count updates: album counts, or with ?album_id= the
+# counts of that album and its songs
+@main.route("/live/votes", methods=["GET"])
+def live_votes():
+    album_id = request.args.get("album_id", type=int)
+    subscriber = vote_stream.subscribe(album_id)
+    if subscriber is None:
+        response = jsonify({"msg": "Too many live clients, try again later"})
+        response.headers["Retry-After"] = str(vote_stream.heartbeat)
+        return response, 503
+    return Response(
+        vote_stream.stream(subscriber),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Bulk import albums with nested songs from an uploaded CSV/JSONL file
+@main.route("/albums/import", methods=["POST"])
+@admin_required()
+def import_albums():
+    if "file" in request.files:
+        upload = request.files["file"]
+        stream = io.TextIOWrapper(upload.stream, encoding="utf8")
+        fmt = request.args.get("format") or detect_format(upload.filename or "")
+    else:
+        # Raw body: text/csv, otherwise JSON lines
+        stream = io.TextIOWrapper(request.stream, encoding="utf8")
+        fmt = request.args.get("format") or (
+            "csv" if request.mimetype == "text/csv" else "jsonl"
+        )
+    try:
+        batch_size = int(request.args.get("batch_size", current_app.config["IMPORT_BATCH_SIZE"]))
+        stats = import_catalog(stream, fmt, max(1, batch_size))
+    except CatalogImportError as e:
+        # Batches before the bad line are already committed; say what got in
+        return jsonify({"msg": str(e), "line": e.line, "imported": e.stats}), 400
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+    return jsonify(stats), 201
 
 
 # UPDATE an existing album
@@ -204,22 +575,44 @@ def update_album(album_id):
     album = Album.query.get_or_404(album_id)
     data = request.get_json()
 
+    old_artist = album.artist
+
     # Update fields if they are provided in the request
     album.title = data.get("title", album.title)
     album.artist = data.get("artist", album.artist)
     album.cover_image_url = data.get("cover_image_url", album.cover_image_url)
 
+    move_album(album_id, old_artist, album.artist)
     db.session.commit()
+    cache.invalidate("albums", f"album:{album_id}")
     return jsonify({"msg": "Album updated successfully"}), 200
 
 
-# DELETE an album (and its songs due to cascading delete in the model)
+# DELETE an album with its songs and votes: a fixed set of DELETE statements
+# in one transaction, without loading the songs or voters into the session
 @main.route("/albums/<int:album_id>", methods=["DELETE"])
 @admin_required()
 def delete_album(album_id):
-    album = Album.query.get_or_404(album_id)
-    db.session.delete(album)
+    found = album_totals(album_id)
+    if found is None:
+        return jsonify({"msg": "Album not found"}), 404
+    artist, totals = found
+    bump_artist(artist, **{name: -value for name, value in totals.items()})
+    drop_empty_artist(artist)
+
+    song_ids = select(Song.id).where(Song.album_id == album_id).scalar_subquery()
+    for stmt in (
+        delete(song_votes).where(song_votes.c.song_id.in_(song_ids)),
+        delete(Song).where(Song.album_id == album_id),
+        delete(album_votes).where(album_votes.c.album_id == album_id),
+        delete(Album).where(Album.id == album_id),
+    ):
+        db.session.execute(stmt, execution_options={"synchronize_session": False})
     db.session.commit()
+    cache.invalidate("albums", f"album:{album_id}", f"album:{album_id}:songs")
+    # Every cached /my-votes may list the deleted ids: one bump, not one per voter
+    cache.invalidate(MY_VOTES_TAG)
+    leaderboard.remove_album(album_id)
     return jsonify({"msg": "Album deleted successfully"}), 200
 
 
@@ -228,17 +621,24 @@ def delete_album(album_id):
 @admin_required()
 def delete_song(song_id):
     song = Song.query.get_or_404(song_id)
+    album_id = song.album_id
+    bump_artist(song.album.artist, song_count=-1, song_votes=-song.vote_count)
+    db.session.execute(delete(song_votes).where(song_votes.c.song_id == song_id))
     db.session.delete(song)
     db.session.commit()
+    cache.invalidate(f"album:{album_id}", f"album:{album_id}:songs")
+    cache.invalidate(MY_VOTES_TAG)
+    leaderboard.remove_song(song_id)
     return jsonify({"msg": "Song deleted successfully"}), 200
 
 
 # We can also add a route to get a single album's details for editing
 @main.route("/albums/<int:album_id>", methods=["GET"])
+@cache.cached(lambda album_id: f"album:{album_id}")
 def get_album_details(album_id):
     album = Album.query.get_or_404(album_id)
     songs = [
-        {"id": song.id, "title": song.title, "vote_count": len(song.voters)}
+        {"id": song.id, "title": song.title, "vote_count": song.vote_count}
         for song in album.songs
     ]
 
@@ -248,7 +648,7 @@ def get_album_details(album_id):
             "title": album.title,
             "artist": album.artist,
             "cover_image_url": album.cover_image_url,
-            "vote_count": len(album.voters),
+            "vote_count": album.vote_count,
             "songs": songs,
         }
     ), 200
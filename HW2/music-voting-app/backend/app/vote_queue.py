@@ -0,0 +1,350 @@
+import atexit
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from .models import db
+from .votes import current_votes, set_votes, votes_committed
+
+
+class VoteQueue:
+    """Optional write-behind buffer for the single-vote routes.
+
+    Toggles are acknowledged from memory and coalesced per
+    (user_id, kind, target_id): an even number of toggles cancels out. A
+    background thread flushes them in one transaction every
+    VOTE_FLUSH_INTERVAL seconds, as soon as VOTE_FLUSH_THRESHOLD targets are
+    pending, and at shutdown.
+
+    With VOTE_JOURNAL_DIR set, every toggle is also appended to a per-process
+    journal so a crash loses nothing that was acknowledged. Journal files are
+    named after a token unique to each process start, and the process holds
+    an exclusive flock on its "<token>.lock" file while it runs; the kernel
+    drops the lock when the process dies, so a journal whose lock can be
+    taken is an orphan even if its pid has since been reused. A flush rotates
+    the journal, resolves the toggles into absolute voted/not-voted states and
+    writes those to a ".resolved" file before touching the database; absolute
+    states can be re-applied safely, so recovery never double-applies a
+    toggle. The journal is bounded by VOTE_JOURNAL_MAX_ENTRIES: when it is
+    full the enqueuing request flushes synchronously.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+        self._owner = None
+        self._owner_lock = None
+        self._journal = None
+        self._journal_entries = 0
+        self.metrics = {
+            "enqueued": 0,
+            "flushed": 0,
+            "flushes": 0,
+            "flush_failures": 0,
+            "last_flush_ms": 0.0,
+            "max_flush_ms": 0.0,
+            "total_flush_ms": 0.0,
+        }
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get("VOTE_WRITE_BEHIND", False)
+        self.interval = app.config.get("VOTE_FLUSH_INTERVAL", 1.0)
+        self.threshold = app.config.get("VOTE_FLUSH_THRESHOLD", 500)
+        self.journal_dir = app.config.get("VOTE_JOURNAL_DIR")
+        self.journal_max_entries = app.config.get("VOTE_JOURNAL_MAX_ENTRIES", 10000)
+        app.extensions["vote_queue"] = self
+        if self.enabled:
+            atexit.register(self.stop)
+
+    # --- Journal files -----------------------------------------------------
+
+    def _path(self, suffix, owner=None):
+        return os.path.join(self.journal_dir, f"votes-{owner or self._owner}{suffix}")
+
+    def _open_journal(self):
+        if self.journal_dir:
+            self._journal = open(self._path(".jsonl"), "a", encoding="utf8")
+
+    @staticmethod
+    def _try_lock(path):
+        """Open path and take an exclusive flock on it; None if someone holds it."""
+        import fcntl
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _take_ownership(self):
+        """Pick this process's journal token and lock it before any journal exists."""
+        if self._owner_lock is not None:
+            # Inherited across a fork: the lock stays with the parent
+            os.close(self._owner_lock)
+        os.makedirs(self.journal_dir, exist_ok=True)
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        self._owner_lock = self._try_lock(self._path(".lock"))
+
+    def _release_ownership(self, remove):
+        if self._owner_lock is None:
+            return
+        if remove:
+            self._remove(self._path(".lock"))
+        os.close(self._owner_lock)
+        self._owner_lock = None
+
+    def _rotate_journal(self):
+        """Move the live journal aside for the flush in progress (lock held)."""
+        if self._journal is None or not self._journal_entries:
+            return
+        self._journal.close()
+        os.replace(self._path(".jsonl"), self._path(".flushing.jsonl"))
+        self._journal_entries = 0
+        self._open_journal()
+
+    def _write_resolved(self, resolved):
+        if not self.journal_dir:
+            return
+        path = self._path(".resolved.json")
+        with open(path + ".tmp", "w", encoding="utf8") as f:
+            json.dump([[u, k, t, v] for (u, k, t), v in resolved.items()], f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        self._remove(self._path(".flushing.jsonl"))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _recover(self):
+        """Take over the journals left behind by dead processes.
+
+        Resolved states are applied straight away; the toggles still in a
+        journal are returned so they can be queued again.
+        """
+        toggles = []
+        owners = set()
+        for path in glob.glob(os.path.join(self.journal_dir, "votes-*")):
+            owner = os.path.basename(path)[len("votes-"):].split(".", 1)[0]
+            # Lock files alone are skipped: a live process creates and locks
+            # its own before writing a journal, and may not hold it yet
+            if owner != self._owner and not path.endswith(".lock"):
+                owners.add(owner)
+
+        for owner in owners:
+            # Holding the owner's lock also keeps other workers from
+            # recovering the same files
+            fd = self._try_lock(self._path(".lock", owner))
+            if fd is None:
+                continue  # still running
+            try:
+                toggles.extend(self._recover_owner(owner))
+            finally:
+                os.close(fd)
+        return toggles
+
+    def _recover_owner(self, owner):
+        """Apply and remove one dead owner's files (its lock held)."""
+        toggles = []
+        resolved = self._path(".resolved.json", owner)
+        if os.path.exists(resolved):
+            with open(resolved, encoding="utf8") as f:
+                states = {(u, k, t): v for u, k, t, v in json.load(f)}
+            results = self._apply(states)  # on failure the files stay for a retry
+            votes_committed(results, {user_id for user_id, _, _ in states})
+            self._remove(resolved)
+        for suffix in (".flushing.jsonl", ".jsonl"):
+            try:
+                with open(self._path(suffix, owner), encoding="utf8") as f:
+                    for line in f:
+                        if line.strip():
+                            toggles.append(json.loads(line))
+            except FileNotFoundError:
+                continue
+        # Also drops any half-written ".tmp" file; the lock file goes last
+        for suffix in (".flushing.jsonl", ".jsonl", ".resolved.json.tmp", ".lock"):
+            self._remove(self._path(suffix, owner))
+        return toggles
+
+    # --- Queue -------------------------------------------------------------
+
+    def _ensure_started(self):
+        # Threads do not survive a fork, so each gunicorn worker starts its own
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._pending = {}
+            self._journal_entries = 0
+            toggles = []
+            if self.journal_dir:
+                self._take_ownership()
+                with self.app.app_context():
+                    toggles = self._recover()
+            self._open_journal()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="vote-queue-flusher", daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+        for toggle in toggles:
+            self.enqueue(*toggle)
+
+    def _push(self, user_id, kind, target_id):
+        key = (user_id, kind, target_id)
+        with self._lock:
+            flip = not self._pending.pop(key, False)
+            if flip:
+                self._pending[key] = True
+            if self._journal is not None:
+                self._journal.write(json.dumps([user_id, kind, target_id]) + "\n")
+                self._journal.flush()
+                self._journal_entries += 1
+            journal_full = self._journal_entries >= self.journal_max_entries
+            return flip, len(self._pending), journal_full
+
+    def enqueue(self, user_id, kind, target_id):
+        """Queue one toggle; returns True if the target is now pending a flip."""
+        self._ensure_started()
+        flip, depth, journal_full = self._push(user_id, kind, target_id)
+        with self._lock:
+            self.metrics["enqueued"] += 1
+        if journal_full:
+            self.flush()
+        elif depth >= self.threshold:
+            self._wake.set()
+        return flip
+
+    def _apply(self, states):
+        """Write absolute {(user_id, kind, target_id): voted} states and commit.
+
+        Returns the vote results of every toggle that was needed.
+        """
+        by_user = {}
+        for (user_id, kind, target_id), voted in states.items():
+            by_user.setdefault(user_id, {})[(kind, target_id)] = voted
+        results = []
+        try:
+            for user_id, desired in by_user.items():
+                results.extend(set_votes(user_id, desired))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return results
+
+    def _resolve(self, batch):
+        """Turn pending flips into the absolute states they lead to."""
+        resolved = {}
+        by_user_kind = {}
+        for user_id, kind, target_id in batch:
+            by_user_kind.setdefault((user_id, kind), []).append(target_id)
+        for (user_id, kind), target_ids in by_user_kind.items():
+            current = current_votes(user_id, kind, target_ids)
+            for target_id in target_ids:
+                resolved[(user_id, kind, target_id)] = target_id not in current
+        db.session.rollback()
+        return resolved
+
+    def flush(self):
+        """Write every pending toggle to the database; returns how many were written."""
+        with self._flush_lock, self.app.app_context():
+            with self._lock:
+                batch = list(self._pending)
+                self._pending = {}
+                self._rotate_journal()
+            if not batch:
+                # Everything in the journal cancelled out
+                if self.journal_dir:
+                    self._remove(self._path(".flushing.jsonl"))
+                return 0
+
+            start = time.perf_counter()
+            try:
+                resolved = self._resolve(batch)
+                self._write_resolved(resolved)
+                results = self._apply(resolved)
+            except Exception:
+                self.metrics["flush_failures"] += 1
+                self.app.logger.exception("Vote queue flush failed")
+                self._requeue(batch)
+                return 0
+            if self.journal_dir:
+                self._remove(self._path(".resolved.json"))
+            votes_committed(results, {user_id for user_id, _, _ in resolved})
+
+            elapsed = (time.perf_counter() - start) * 1000
+            self.metrics["flushes"] += 1
+            self.metrics["flushed"] += len(batch)
+            self.metrics["last_flush_ms"] = elapsed
+            self.metrics["max_flush_ms"] = max(self.metrics["max_flush_ms"], elapsed)
+            self.metrics["total_flush_ms"] += elapsed
+            return len(batch)
+
+    def _requeue(self, batch):
+        """Queue a batch whose flush was rolled back again (toggles commute)."""
+        if self.journal_dir:
+            # Either file may hold the batch depending on where the flush stopped
+            self._remove(self._path(".resolved.json"))
+            self._remove(self._path(".flushing.jsonl"))
+        for user_id, kind, target_id in batch:
+            self._push(user_id, kind, target_id)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                self.app.logger.exception("Vote queue worker error")
+
+    def stop(self):
+        """Stop the worker and flush what is left (registered with atexit)."""
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=10)
+        self.flush()
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+            if not self._journal_entries:
+                self._remove(self._path(".jsonl"))
+            # Keep the lock file while a journal is left for recovery
+            self._release_ownership(remove=not self._journal_entries)
+
+    def stats(self):
+        with self._lock:
+            metrics = dict(self.metrics)
+            metrics["depth"] = len(self._pending)
+            metrics["journal_entries"] = self._journal_entries
+        flushes = metrics["flushes"]
+        metrics["avg_flush_ms"] = metrics["total_flush_ms"] / flushes if flushes else 0.0
+        metrics["enabled"] = self.enabled
+        return metrics
+
+
+vote_queue = VoteQueue()
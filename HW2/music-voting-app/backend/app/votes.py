@@ -0,0 +1,240 @@
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from .artist_stats import count_votes
+from .extensions import cache
+from .leaderboard import leaderboard
+from .live import vote_stream
+from .models import db, Album, Song, album_votes, song_votes
+
+# Shared by every cached /my-votes response, next to the per-user tag;
+# bumped when albums or songs are deleted
+MY_VOTES_TAG = "my-votes"
+
+# kind -> (model, association table, target column on the association table)
+VOTE_TARGETS = {
+    "album": (Album, album_votes, album_votes.c.album_id),
+    "song": (Song, song_votes, song_votes.c.song_id),
+}
+
+
+class TargetNotFound(LookupError):
+    pass
+
+
+def insert_ignore(table, rows):
+    """INSERT rows, silently skipping any that collide with the primary key."""
+    if db.engine.dialect.name == "sqlite":
+        stmt = sqlite_insert(table).on_conflict_do_nothing()
+    else:
+        stmt = insert(table).prefix_with("IGNORE", dialect="mysql")
+    return db.session.execute(stmt, rows)
+
+
+def toggle_vote(kind, user_id, target_id):
+    """Flip a user's vote on an album or song without loading the ORM collections.
+
+    Works directly on the association table keyed by its composite primary
+    key and keeps the target's vote_count in step. Does not commit. Returns
+    (voted, vote_count) after the toggle, or raises TargetNotFound.
+    """
+    model, table, target_column = VOTE_TARGETS[kind]
+    vote_filter = (table.c.user_id == user_id, target_column == target_id)
+
+    removed = db.session.execute(delete(table).where(*vote_filter)).rowcount
+    if removed:
+        delta = -1
+    else:
+        inserted = insert_ignore(
+            table, [{"user_id": user_id, target_column.key: target_id}]
+        ).rowcount
+        # rowcount is 0 if a concurrent request inserted the same vote first
+        delta = 1 if inserted else 0
+
+    if delta:
+        db.session.execute(
+            update(model)
+            .where(model.id == target_id)
+            .values(vote_count=model.vote_count + delta)
+        )
+        count_votes(kind, [target_id], delta)
+    vote_count = db.session.execute(
+        select(model.vote_count).where(model.id == target_id)
+    ).scalar()
+    if vote_count is None:
+        # The caller rolls back whatever was written for the missing target
+        raise TargetNotFound(f"{kind.capitalize()} not found")
+    return not removed, vote_count
+
+
+def current_votes(user_id, kind, target_ids, lock=False):
+    """Return the subset of target_ids the user has currently voted for."""
+    _, table, target_column = VOTE_TARGETS[kind]
+    query = select(target_column).where(
+        table.c.user_id == user_id, target_column.in_(target_ids)
+    )
+    if lock:
+        query = query.with_for_update()
+    return set(db.session.execute(query).scalars())
+
+
+def peek_vote(kind, user_id, target_id):
+    """Read (voted, vote_count) for one target without writing anything."""
+    model, table, target_column = VOTE_TARGETS[kind]
+    voted = (
+        select(table.c.user_id)
+        .where(table.c.user_id == user_id, target_column == target_id)
+        .exists()
+    )
+    row = db.session.execute(
+        select(voted, model.vote_count).where(model.id == target_id)
+    ).first()
+    if row is None:
+        raise TargetNotFound(f"{kind.capitalize()} not found")
+    return bool(row[0]), row[1]
+
+
+def set_votes(user_id, desired):
+    """Bring a user's votes to the given {(kind, target_id): voted} states.
+
+    Idempotent: only targets whose stored state differs are toggled, so the
+    same states can be applied again safely. Does not commit.
+    """
+    toggles = []
+    for kind in VOTE_TARGETS:
+        target_ids = [t for (k, t) in desired if k == kind]
+        if not target_ids:
+            continue
+        current = current_votes(user_id, kind, target_ids, lock=True)
+        toggles.extend(
+            (kind, t) for t in target_ids if (t in current) != desired[(kind, t)]
+        )
+    return apply_vote_batch(user_id, toggles) if toggles else []
+
+
+def apply_vote_batch(user_id, items):
+    """Apply an ordered list of (kind, target_id) toggles for one user.
+
+    Toggles on the same target are coalesced (an even number cancels out), so
+    each vote table sees at most one bulk DELETE and one bulk INSERT. Does not
+    commit. Returns one result dict per item, in order, each with the
+    vote_count matching that item's own "voted" state.
+    """
+    results = [None] * len(items)
+    for kind, (model, table, target_column) in VOTE_TARGETS.items():
+        positions = [i for i, (k, _) in enumerate(items) if k == kind]
+        if not positions:
+            continue
+        target_ids = {items[i][1] for i in positions}
+
+        existing = set(
+            db.session.execute(
+                select(model.id).where(model.id.in_(target_ids))
+            ).scalars()
+        )
+        # Lock the user's current votes on these targets until commit
+        current = current_votes(user_id, kind, existing, lock=True)
+
+        # Replay the toggles in memory to find each item's state and the final one
+        state = {target_id: target_id in current for target_id in existing}
+        for i in positions:
+            target_id = items[i][1]
+            if target_id not in existing:
+                results[i] = {"type": kind, "id": target_id, "error": "not found"}
+                continue
+            state[target_id] = not state[target_id]
+            results[i] = {"type": kind, "id": target_id, "voted": state[target_id]}
+
+        to_delete = [t for t in existing if t in current and not state[t]]
+        to_insert = [t for t in existing if t not in current and state[t]]
+        if to_delete:
+            db.session.execute(
+                delete(table).where(
+                    table.c.user_id == user_id, target_column.in_(to_delete)
+                )
+            )
+            db.session.execute(
+                update(model)
+                .where(model.id.in_(to_delete))
+                .values(vote_count=model.vote_count - 1)
+            )
+            count_votes(kind, to_delete, -1)
+        if to_insert:
+            insert_ignore(
+                table,
+                [{"user_id": user_id, target_column.key: t} for t in to_insert],
+            )
+            db.session.execute(
+                update(model)
+                .where(model.id.in_(to_insert))
+                .values(vote_count=model.vote_count + 1)
+            )
+            count_votes(kind, to_insert, 1)
+
+        counts = dict(
+            db.session.execute(
+                select(model.id, model.vote_count).where(model.id.in_(existing))
+            ).all()
+        )
+        # An item toggled again later in the batch reports the count as of
+        # its own toggle: the final count, less the user's final vote, plus
+        # the vote this item left. The last item per target has the final count.
+        for i in positions:
+            if "voted" in results[i]:
+                target_id = items[i][1]
+                results[i]["vote_count"] = (
+                    counts[target_id] - state[target_id] + results[i]["voted"]
+                )
+    return results
+
+
+def song_album_ids(song_ids):
+    """Map song id -> album id."""
+    if not song_ids:
+        return {}
+    rows = db.session.execute(select(Song.id, Song.album_id).where(Song.id.in_(song_ids)))
+    return dict(rows.all())
+
+
+def invalidate_vote_caches(targets, song_albums=None):
+    """Invalidate the cached listings showing the vote counts of (kind, id) targets."""
+    tags = set()
+    song_ids = set()
+    for kind, target_id in targets:
+        if kind == "album":
+            tags.update(("albums", f"album:{target_id}"))
+        else:
+            song_ids.add(target_id)
+    if song_albums is None:
+        song_albums = song_album_ids(song_ids)
+    for song_id in song_ids:
+        album_id = song_albums.get(song_id)
+        if album_id is not None:
+            tags.update((f"album:{album_id}", f"album:{album_id}:songs"))
+    cache.invalidate(*tags)
+
+
+def invalidate_my_votes(user_ids):
+    """Drop the cached /my-votes responses of these users."""
+    cache.invalidate(*(f"user:{user_id}:votes" for user_id in user_ids))
+
+
+def votes_committed(results, user_ids=()):
+    """Propagate committed vote results to the caches, leaderboard and live stream.
+
+    results are the dicts produced by apply_vote_batch (type, id, voted,
+    vote_count); entries without "voted" (targets not found) are skipped.
+    user_ids are the voters, whose cached /my-votes responses are dropped.
+    """
+    invalidate_my_votes(user_ids)
+    results = [r for r in results if "voted" in r]
+    song_albums = song_album_ids({r["id"] for r in results if r["type"] == "song"})
+    for r in results:
+        leaderboard.update(r["type"], r["id"], r["vote_count"])
+    invalidate_vote_caches({(r["type"], r["id"]) for r in results}, song_albums)
+    events = []
+    for r in results:
+        event = {"type": r["type"], "id": r["id"], "vote_count": r["vote_count"]}
+        if r["type"] == "song":
+            event["album_id"] = song_albums.get(r["id"])
+        events.append(event)
+    vote_stream.publish(events)
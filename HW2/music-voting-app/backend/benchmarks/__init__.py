@@ -0,0 +1,5 @@
+"""Benchmarks for the music-voting backend; run from the backend directory.
+
+    python -m benchmarks.api            # listing/detail/vote/my-votes latency
+    python -m benchmarks.signup_latency # /api/register as the user table grows
+"""
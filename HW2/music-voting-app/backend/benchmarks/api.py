@@ -0,0 +1,233 @@
+"""Load test: latency and throughput of the main read and vote endpoints.
+
+Seeds a scratch database, then times each scenario and prints p50/p95/p99
+latency and requests per second. Results also go to a JSON file so runs
+can be compared.
+
+    python -m benchmarks.api --output before.json
+    python -m benchmarks.api --users 2000 --albums 5000 --concurrency 8 --server
+    python -m benchmarks.api --database-url mysql+pymysql://... --scenarios vote_album my_votes
+
+By default requests go through the Flask test client, which measures the
+application and database without socket overhead; --server runs the app
+on a local threaded WSGI server and talks HTTP to it instead. Point
+--database-url at a scratch database: the tables are dropped and recreated.
+"""
+import argparse
+import http.client
+import json
+import platform
+import random
+import subprocess
+import threading
+import time
+from datetime import datetime, timezone
+
+from .common import bench_app, summarize
+from .seed import seed_database
+from flask_jwt_extended import create_access_token
+from werkzeug.serving import WSGIRequestHandler, make_server
+from app.extensions import db
+
+# name -> fn(rng, n) returning (method, path, json body or None, needs a token)
+SCENARIOS = {
+    "list_albums": lambda rng, n: ("GET", "/api/albums?limit=50", None, False),
+    "list_albums_by_votes": lambda rng, n: (
+        "GET", "/api/albums?limit=50&sort=vote_count", None, False
+    ),
+    "album_detail": lambda rng, n: (
+        "GET", f"/api/albums/{rng.randint(1, n['albums'])}", None, False
+    ),
+    "album_songs": lambda rng, n: (
+        "GET", f"/api/albums/{rng.randint(1, n['albums'])}/songs", None, False
+    ),
+    "vote_album": lambda rng, n: (
+        "POST", f"/api/vote/album/{rng.randint(1, n['albums'])}", None, True
+    ),
+    "vote_song": lambda rng, n: (
+        "POST", f"/api/vote/song/{rng.randint(1, n['songs'])}", None, True
+    ),
+    "vote_batch": lambda rng, n: (
+        "POST",
+        "/api/vote/batch",
+        {"votes": [{"type": "song", "id": rng.randint(1, n["songs"])} for _ in range(20)]},
+        True,
+    ),
+    "my_votes": lambda rng, n: ("GET", "/api/my-votes", None, True),
+}
+
+
+class TestClientTransport:
+    """One Flask test client per thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def request(self, method, path, body, headers):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client.open(path, method=method, json=body, headers=headers).status_code
+
+    def close(self):
+        pass
+
+
+class _QuietHandler(WSGIRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+class HttpTransport:
+    """A threaded local WSGI server and one keep-alive connection per thread."""
+
+    def __init__(self, app):
+        self.server = make_server(
+            "127.0.0.1", 0, app, threaded=True, request_handler=_QuietHandler
+        )
+        self.port = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self._local = threading.local()
+
+    def request(self, method, path, body, headers):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = http.client.HTTPConnection("127.0.0.1", self.port)
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers = dict(headers, **{"Content-Type": "application/json"})
+        conn.request(method, path, body=payload, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        return response.status
+
+    def close(self):
+        self.server.shutdown()
+
+
+def run_scenario(transport, make_request, counts, tokens, requests, concurrency, seed):
+    """Issue `requests` calls split over `concurrency` threads; returns the summary."""
+    samples, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker(index, quota):
+        rng = random.Random(f"{seed}:{index}")
+        local_samples, local_errors = [], 0
+        for _ in range(quota):
+            method, path, body, needs_token = make_request(rng, counts)
+            headers = {}
+            if needs_token:
+                headers["Authorization"] = "Bearer " + rng.choice(tokens)
+            t0 = time.perf_counter()
+            try:
+                status = transport.request(method, path, body, headers)
+            except Exception:
+                status = None
+            local_samples.append((time.perf_counter() - t0) * 1000)
+            if status is None or status >= 400:
+                local_errors += 1
+        with lock:
+            samples.extend(local_samples)
+            errors[0] += local_errors
+
+    quotas = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    threads = [threading.Thread(target=worker, args=(i, q)) for i, q in enumerate(quotas)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(samples, time.perf_counter() - start, errors[0])
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--database-url", help="Scratch database (default: temporary SQLite file)")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--albums", type=int, default=1000)
+    parser.add_argument("--songs-per-album", type=int, default=10)
+    parser.add_argument("--votes-per-user", type=int, default=20,
+                        help="Album votes and song votes seeded per user")
+    parser.add_argument("--requests", type=int, default=500, help="Timed requests per scenario")
+    parser.add_argument("--warmup", type=int, default=20, help="Untimed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=1, help="Client threads")
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(SCENARIOS),
+                        default=list(SCENARIOS))
+    parser.add_argument("--server", action="store_true",
+                        help="Go through a local HTTP server instead of the test client")
+    parser.add_argument("--no-cache", action="store_true", help="Run with CACHE_ENABLED off")
+    parser.add_argument("--write-behind", action="store_true", help="Run with VOTE_WRITE_BEHIND on")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    app = bench_app(
+        args.database_url,
+        "api",
+        CACHE_ENABLED=not args.no_cache,
+        VOTE_WRITE_BEHIND=args.write_behind,
+    )
+    with app.app_context():
+        t0 = time.perf_counter()
+        counts = seed_database(
+            args.users, args.albums, args.songs_per_album, args.votes_per_user, args.seed
+        )
+        seed_seconds = time.perf_counter() - t0
+        tokens = [
+            create_access_token(identity=str(user_id), additional_claims={"is_admin": user_id == 1})
+            for user_id in range(1, args.users + 1)
+        ]
+        dialect = db.engine.dialect.name
+    print(f"Seeded {counts} in {seed_seconds:.1f}s ({dialect})")
+
+    transport = HttpTransport(app) if args.server else TestClientTransport(app)
+    results = {}
+    print(f"{'scenario':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>9} {'errors':>7}")
+    try:
+        for name in args.scenarios:
+            make_request = SCENARIOS[name]
+            if args.warmup:
+                run_scenario(transport, make_request, counts, tokens, args.warmup, 1, args.seed)
+            result = run_scenario(
+                transport, make_request, counts, tokens,
+                args.requests, args.concurrency, args.seed,
+            )
+            results[name] = result
+            print(f"{name:<22} {result.get('p50_ms', 0):>8.2f} {result.get('p95_ms', 0):>8.2f} "
+                  f"{result.get('p99_ms', 0):>8.2f} {result.get('throughput_rps', 0):>9.1f} "
+                  f"{result['errors']:>7}")
+    finally:
+        transport.close()
+
+    if args.output:
+        report = {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "database": dialect,
+            "transport": "http" if args.server else "test_client",
+            "options": {k: v for k, v in vars(args).items() if k not in ("output", "database_url")},
+            "seeded": counts,
+            "seed_seconds": round(seed_seconds, 3),
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
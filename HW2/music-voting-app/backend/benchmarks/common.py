@@ -0,0 +1,50 @@
+import os
+import statistics
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config  # noqa: E402
+from app import create_app  # noqa: E402
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def summarize(samples, seconds, errors=0):
+    """Latency percentiles (ms) and throughput for one scenario."""
+    if not samples:
+        return {"requests": 0, "errors": errors}
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p95_ms": round(percentile(samples, 95), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "throughput_rps": round(len(samples) / seconds, 1) if seconds else 0.0,
+    }
+
+
+def bench_app(database_url=None, name="benchmark", **overrides):
+    """create_app() against a scratch database (default: temporary SQLite file).
+
+    Uses BCRYPT_LOG_ROUNDS=4 so the numbers show database cost, not bcrypt.
+    """
+    database_url = database_url or "sqlite:///" + os.path.join(
+        tempfile.mkdtemp(), f"{name}.db"
+    )
+
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = database_url
+        SECRET_KEY = JWT_SECRET_KEY = "benchmark-secret-key-benchmark-secret"
+        BCRYPT_LOG_ROUNDS = 4
+        QUERY_BUDGET_MS = 10 ** 6  # don't log every slow request under load
+
+    for key, value in overrides.items():
+        setattr(BenchConfig, key, value)
+    return create_app(BenchConfig)
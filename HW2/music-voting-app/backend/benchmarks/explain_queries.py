@@ -0,0 +1,211 @@
+"""Index audit: EXPLAIN every statement the API issues against seeded data.
+
+Seeds a scratch database, calls every /api route with representative
+arguments (listings with each sort, filter and a follow-up cursor page,
+details, votes, admin writes), records the SQL through the query profiler
+and runs each distinct statement under EXPLAIN. Full table scans and sorts
+that need a temporary table are flagged.
+
+    python -m benchmarks.explain_queries
+    python -m benchmarks.explain_queries --database-url mysql+pymysql://... --fail-on-scan
+
+Some scans are by design: the leaderboard rebuild, reconcile-votes and the
+catalog listing read whole tables. Point --database-url at a scratch
+database: the tables are dropped and recreated.
+"""
+import argparse
+import io
+import json
+import sys
+
+from .common import bench_app
+from .seed import seed_database
+from flask_jwt_extended import create_access_token
+from app.extensions import db
+from app.profiling import query_profiler
+
+LISTINGS = [
+    "/api/albums?limit=5",
+    "/api/albums?limit=5&sort=title",
+    "/api/albums?limit=5&sort=artist",
+    "/api/albums?limit=5&sort=-vote_count",
+    "/api/albums?limit=5&artist=Artist%2000001",
+    "/api/albums?limit=5&title=Album%20000",
+    "/api/albums/1/songs?limit=2",
+    "/api/albums/1/songs?limit=2&sort=title",
+    "/api/albums/1/songs?limit=2&sort=-vote_count",
+    "/api/albums/1/songs?limit=2&title=Track",
+    "/api/catalog?limit=5",
+    "/api/catalog?limit=5&include=songs",
+    "/api/artists/stats?limit=5",
+    "/api/artists/stats?limit=5&sort=-album_votes",
+    "/api/artists/stats?limit=5&sort=-song_votes",
+]
+
+
+def drive_api(app, user_token, admin_token):
+    """Call every route; returns the endpoints that were reached."""
+    client = app.test_client()
+    user = {"Authorization": "Bearer " + user_token}
+    admin = {"Authorization": "Bearer " + admin_token}
+    reached = set()
+
+    def call(method, path, headers=None, **kwargs):
+        response = client.open(path, method=method, headers=headers or {}, **kwargs)
+        endpoint, _ = app.url_map.bind("localhost").match(path.split("?")[0], method)
+        reached.add(endpoint)
+        if response.status_code >= 400:
+            print(f"  {method} {path} -> {response.status_code}", file=sys.stderr)
+        return response
+
+    for path in LISTINGS:
+        cursor = call("GET", path).headers.get("X-Next-Cursor")
+        if cursor:
+            call("GET", f"{path}&cursor={cursor}")
+
+    call("GET", "/api/albums/1")
+    call("GET", "/api/artists/stats/Artist 00001")
+    call("GET", "/api/leaderboard/albums")
+    call("GET", "/api/albums/1/leaderboard")
+    call("POST", "/api/login", json={"username": "user1", "password": "benchmark"})
+    call("POST", "/api/register", json={"username": "explain-user", "password": "benchmark"})
+    call("GET", "/api/profile", user)
+    call("GET", "/api/my-votes", user)
+    call("GET", "/api/my-votes?format=rle", user)
+
+    # Each toggle twice, so the seeded votes are left as they were
+    for _ in range(2):
+        call("POST", "/api/vote/album/1", user)
+        call("POST", "/api/vote/song/1", user)
+        call("POST", "/api/vote/batch", user, json={
+            "votes": [{"type": "album", "id": 2}, {"type": "song", "id": 2}]
+        })
+
+    album_id = call("POST", "/api/albums", admin, json={
+        "title": "Explain", "artist": "Explain Artist"
+    }).get_json()["id"]
+    song_id = call("POST", f"/api/albums/{album_id}/songs", admin, json={
+        "title": "Explain Track"
+    }).get_json()["id"]
+    call("PUT", f"/api/albums/{album_id}", admin, json={"artist": "Explain Artist 2"})
+    call("DELETE", f"/api/songs/{song_id}", admin)
+    call("DELETE", f"/api/albums/{album_id}", admin)
+    call("POST", "/api/albums/import", admin,
+         data=io.BytesIO(b'{"title": "Imported", "artist": "Artist 00001", "songs": ["A"]}\n'),
+         content_type="application/x-ndjson")
+    call("GET", "/api/vote-queue/stats", admin)
+    call("GET", "/api/metrics", admin)
+    return reached
+
+
+def explain(conn, statement, parameters, tables):
+    """Return (plan lines, problems, notes) for one statement."""
+    limited = " LIMIT " in statement.upper()
+    problems, notes = [], []
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        plan = [row[-1] for row in rows]
+        sorted_in_memory = any(d.startswith("USE TEMP B-TREE") for d in plan)
+        for detail in plan:
+            words = detail.split()
+            if words[0] == "SCAN" and words[1] in tables and "USING" not in words:
+                # A rowid-order scan under LIMIT stops after one page
+                if limited and not sorted_in_memory:
+                    notes.append(f"scan of {words[1]} in key order, bounded by LIMIT")
+                else:
+                    problems.append(f"full scan of {words[1]}")
+            elif detail.startswith("USE TEMP B-TREE"):
+                problems.append(detail.lower())
+        return plan, problems, notes
+
+    result = conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+    keys = list(result.keys())
+    plan = []
+    for row in result.all():
+        row = dict(zip(keys, row))
+        extra = row.get("Extra") or ""
+        plan.append(
+            f"{row.get('table')}: type={row.get('type')} key={row.get('key')} "
+            f"rows={row.get('rows')} {extra}".rstrip()
+        )
+        if row.get("type") == "ALL" and row.get("table") in tables:
+            problems.append(f"full scan of {row['table']}")
+        elif row.get("type") == "index" and limited and "filesort" not in extra:
+            notes.append(f"scan of {row['table']} in key order, bounded by LIMIT")
+        if "filesort" in extra:
+            problems.append(f"filesort on {row.get('table')}")
+    return plan, problems, notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--database-url", help="Scratch database (default: temporary SQLite file)")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--albums", type=int, default=500)
+    parser.add_argument("--songs-per-album", type=int, default=10)
+    parser.add_argument("--votes-per-user", type=int, default=20)
+    parser.add_argument("--output", help="Write the audit as JSON to this file")
+    parser.add_argument("--fail-on-scan", action="store_true",
+                        help="Exit with status 1 if any statement scans a whole table")
+    args = parser.parse_args()
+
+    # Uncached, so every request reaches the database
+    app = bench_app(args.database_url, "explain_queries", CACHE_ENABLED=False)
+    with app.app_context():
+        seed_database(args.users, args.albums, args.songs_per_album, args.votes_per_user)
+        user_token = create_access_token(identity="2", additional_claims={"is_admin": False})
+        admin_token = create_access_token(identity="1", additional_claims={"is_admin": True})
+        # Refresh planner statistics for the seeded data
+        if db.engine.dialect.name == "sqlite":
+            db.session.execute(db.text("ANALYZE"))
+        db.session.commit()
+
+    with query_profiler.count_queries() as recorded:
+        reached = drive_api(app, user_token, admin_token)
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()
+                 if rule.endpoint.startswith("main.")}
+    missed = sorted(endpoints - reached - {"main.live_votes"})
+
+    seen = {}
+    for statement, parameters, executemany in recorded.queries:
+        keyword = statement.lstrip().split(None, 1)[0].upper()
+        if executemany or statement in seen:
+            continue
+        if keyword in ("SELECT", "UPDATE", "DELETE") or (keyword == "INSERT" and "SELECT" in statement):
+            seen[statement] = parameters
+
+    report = []
+    with app.app_context(), db.engine.connect() as conn:
+        tables = set(db.metadata.tables)
+        for statement, parameters in seen.items():
+            plan, problems, notes = explain(conn, statement, parameters, tables)
+            report.append(
+                {"statement": statement, "plan": plan, "problems": problems, "notes": notes}
+            )
+
+    flagged = [entry for entry in report if entry["problems"]]
+    for entry in flagged:
+        print("-" * 72)
+        print(" ".join(entry["statement"].split()))
+        for line in entry["plan"]:
+            print("    " + line)
+        print("  !! " + "; ".join(entry["problems"]))
+    print("-" * 72)
+    noted = sum(1 for entry in report if entry["notes"] and not entry["problems"])
+    print(f"{len(report)} distinct statements from {len(reached)} endpoints, "
+          f"{len(flagged)} flagged, {noted} bounded scan(s) not shown.")
+    if missed:
+        print("Endpoints not exercised: " + ", ".join(missed))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf8") as f:
+            json.dump({"statements": report, "missed_endpoints": missed}, f, indent=2)
+        print(f"Wrote {args.output}")
+    if args.fail_on_scan and any(
+        p.startswith("full scan") for entry in flagged for p in entry["problems"]
+    ):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Deterministic seed data for the benchmarks.
+
+The same counts and --seed always produce the same rows, so two runs of a
+benchmark against different code see identical data.
+"""
+import random
+
+from sqlalchemy import insert
+from app.artist_stats import rebuild_artist_stats
+from app.commands import reconcile_vote_counts
+from app.extensions import db
+from app.models import User, Album, Song, album_votes, song_votes
+
+CHUNK = 10000
+
+
+def _insert(target, rows):
+    for start in range(0, len(rows), CHUNK):
+        db.session.execute(insert(target), rows[start:start + CHUNK])
+
+
+def seed_database(users, albums, songs_per_album, votes_per_user, seed=0):
+    """Drop and recreate the tables, then fill them. Run inside an app context.
+
+    Each user votes for votes_per_user distinct albums and as many distinct
+    songs. Ids are assigned in insert order starting at 1. Returns the counts.
+    """
+    rng = random.Random(seed)
+    db.drop_all()
+    db.create_all()
+
+    seed_user = User()
+    seed_user.set_password("benchmark")
+    _insert(User, [
+        {"username": f"user{i}", "password_hash": seed_user.password_hash, "is_admin": i == 0}
+        for i in range(users)
+    ])
+    _insert(Album, [
+        {"title": f"Album {i:06d}", "artist": f"Artist {i % max(1, albums // 10):05d}"}
+        for i in range(albums)
+    ])
+    _insert(Song, [
+        {"album_id": album_id, "title": f"Track {n:02d}"}
+        for album_id in range(1, albums + 1)
+        for n in range(songs_per_album)
+    ])
+    db.session.commit()
+
+    song_total = albums * songs_per_album
+    album_rows, song_rows = [], []
+    for user_id in range(1, users + 1):
+        for album_id in rng.sample(range(1, albums + 1), min(votes_per_user, albums)):
+            album_rows.append({"user_id": user_id, "album_id": album_id})
+        for song_id in rng.sample(range(1, song_total + 1), min(votes_per_user, song_total)):
+            song_rows.append({"user_id": user_id, "song_id": song_id})
+    _insert(album_votes, album_rows)
+    _insert(song_votes, song_rows)
+    db.session.commit()
+    reconcile_vote_counts()
+    rebuild_artist_stats()
+    db.session.commit()
+
+    return {
+        "users": users,
+        "albums": albums,
+        "songs": song_total,
+        "album_votes": len(album_rows),
+        "song_votes": len(song_rows),
+    }
@@ -0,0 +1,66 @@
+"""Load test: /api/register latency as the user table grows.
+
+Seeds the user table in steps and times a burst of signups at each size.
+With the single-insert registration the median should stay flat; the old
+COUNT(*) per signup grew with the table.
+
+    python -m benchmarks.signup_latency --sizes 0 10000 100000 --signups 200
+    python -m benchmarks.signup_latency --database-url mysql+pymysql://...
+
+Uses BCRYPT_LOG_ROUNDS=4 so the numbers show database cost, not bcrypt.
+Point --database-url at a scratch database: the tables are dropped and
+recreated.
+"""
+import argparse
+import statistics
+import time
+
+from .common import bench_app, percentile
+from sqlalchemy import insert
+from app.extensions import db
+from app.models import User
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--database-url", help="Scratch database (default: temporary SQLite file)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 10000, 100000])
+    parser.add_argument("--signups", type=int, default=200, help="Signups timed per size")
+    args = parser.parse_args()
+
+    app = bench_app(args.database_url, "signup_latency")
+    client = app.test_client()
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        seed_user = User()
+        seed_user.set_password("seed-password")
+        password_hash = seed_user.password_hash
+
+    seeded = 0
+    print(f"{'users':>10} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for size in sorted(args.sizes):
+        with app.app_context():
+            rows = [
+                {"username": f"seed{i}", "password_hash": password_hash, "is_admin": False}
+                for i in range(seeded, size)
+            ]
+            for start in range(0, len(rows), 10000):
+                db.session.execute(insert(User), rows[start:start + 10000])
+            db.session.commit()
+        seeded = max(seeded, size)
+
+        samples = []
+        for i in range(args.signups):
+            payload = {"username": f"bench{size}-{i}", "password": "benchmark"}
+            t0 = time.perf_counter()
+            response = client.post("/api/register", json=payload)
+            samples.append((time.perf_counter() - t0) * 1000)
+            assert response.status_code == 201, response.get_json()
+        seeded += args.signups
+        print(f"{size:>10} {statistics.median(samples):>8.2f} "
+              f"{percentile(samples, 95):>8.2f} {max(samples):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
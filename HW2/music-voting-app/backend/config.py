@@ -7,4 +7,75 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
\ No newline at end of file
+    JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY')
+
+    # SQLAlchemy connection pool; size it to the worker's thread count.
+    # Connections idle longer than DB_POOL_RECYCLE seconds are replaced
+    # before MySQL's wait_timeout can drop them.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 280))
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
+
+    # Per-request SQL profiling: Server-Timing headers on every response and
+    # a warning log for requests over either budget
+    QUERY_PROFILING = os.environ.get('QUERY_PROFILING', '1') == '1'
+    QUERY_BUDGET_COUNT = int(os.environ.get('QUERY_BUDGET_COUNT', 20))
+    QUERY_BUDGET_MS = int(os.environ.get('QUERY_BUDGET_MS', 500))
+
+    # Keyset pagination for the album and song listings
+    DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 50))
+    MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 200))
+
+    # Upper bound on the number of toggles accepted by POST /api/vote/batch
+    MAX_VOTE_BATCH = int(os.environ.get('MAX_VOTE_BATCH', 500))
+
+    # Response cache for the public album listings; set CACHE_REDIS_URL to
+    # share entries and invalidations between gunicorn workers
+    CACHE_ENABLED = os.environ.get('CACHE_ENABLED', '1') == '1'
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 30))
+    CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL')
+
+    # Write-behind mode for the single-vote routes: votes are acknowledged
+    # from memory and flushed in bulk. VOTE_JOURNAL_DIR enables the
+    # crash-recovery journal (one file per worker process).
+    VOTE_WRITE_BEHIND = os.environ.get('VOTE_WRITE_BEHIND', '0') == '1'
+    VOTE_FLUSH_INTERVAL = float(os.environ.get('VOTE_FLUSH_INTERVAL', 1.0))
+    VOTE_FLUSH_THRESHOLD = int(os.environ.get('VOTE_FLUSH_THRESHOLD', 500))
+    VOTE_JOURNAL_DIR = os.environ.get('VOTE_JOURNAL_DIR')
+    VOTE_JOURNAL_MAX_ENTRIES = int(os.environ.get('VOTE_JOURNAL_MAX_ENTRIES', 10000))
+
+    # Process-level cache of the JWT user (id, username, is_admin)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_MAX_ENTRIES = int(os.environ.get('USER_CACHE_MAX_ENTRIES', 4096))
+
+    # In-memory leaderboard, rebuilt periodically to pick up other workers' votes
+    LEADERBOARD_REFRESH_SECONDS = int(os.environ.get('LEADERBOARD_REFRESH_SECONDS', 60))
+    LEADERBOARD_MAX_LIMIT = int(os.environ.get('LEADERBOARD_MAX_LIMIT', 100))
+
+    # Server-sent vote counts (GET /api/live/votes): updates are coalesced
+    # per target and pushed every LIVE_VOTES_INTERVAL seconds; a client more
+    # than LIVE_VOTES_BUFFER targets behind is disconnected. Each connected
+    # client holds a request thread for as long as it stays connected, so run
+    # gunicorn with a threaded or gevent worker (-k gthread --threads N, or
+    # -k gevent): under the default sync worker one viewer blocks a whole
+    # worker. LIVE_VOTES_MAX_CLIENTS is a per-worker cap: keep it below the
+    # threads per worker so ordinary requests still get served (24 suits
+    # --threads 32).
+    LIVE_VOTES_INTERVAL = float(os.environ.get('LIVE_VOTES_INTERVAL', 0.5))
+    LIVE_VOTES_BUFFER = int(os.environ.get('LIVE_VOTES_BUFFER', 256))
+    LIVE_VOTES_HEARTBEAT = int(os.environ.get('LIVE_VOTES_HEARTBEAT', 15))
+    LIVE_VOTES_MAX_CLIENTS = int(os.environ.get('LIVE_VOTES_MAX_CLIENTS', 24))
+
+    # Rows per executemany batch for flask import-catalog / POST /api/albums/import
+    IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+
+    # bcrypt cost and the bounded hashing pool used by register/login;
+    # hashes made with another cost are upgraded on the next login
+    BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 12))
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', 8))
+    PASSWORD_HASH_WAIT = float(os.environ.get('PASSWORD_HASH_WAIT', 0.05))
+    PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER', 1))
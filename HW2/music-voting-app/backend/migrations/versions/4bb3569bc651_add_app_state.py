@@ -0,0 +1,35 @@
+"""Add app_state table for the first-admin flag.
+
+Revision ID: 4bb3569bc651
+Revises: ec38edb56238
+Create Date: 2025-10-24 09:12:40.551820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4bb3569bc651'
+down_revision = 'ec38edb56238'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    app_state = op.create_table('app_state',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('admin_claimed', sa.Boolean(), server_default=sa.false(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+    # Existing installs already have their first admin
+    user = sa.table('user', sa.column('is_admin', sa.Boolean()))
+    has_admin = op.get_bind().execute(
+        sa.select(sa.exists().where(user.c.is_admin == sa.true()))
+    ).scalar()
+    op.bulk_insert(app_state, [{'id': 1, 'admin_claimed': bool(has_admin)}])
+
+
+def downgrade():
+    op.drop_table('app_state')
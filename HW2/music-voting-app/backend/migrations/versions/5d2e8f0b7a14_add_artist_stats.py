@@ -0,0 +1,50 @@
+"""Add artist_stats table with per-artist totals.
+
+Revision ID: 5d2e8f0b7a14
+Revises: 4bb3569bc651
+Create Date: 2025-10-27 14:05:12.318904
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8f0b7a14'
+down_revision = '4bb3569bc651'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('artist_stats',
+    sa.Column('artist', sa.String(length=120), nullable=False),
+    sa.Column('album_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('song_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('album_votes', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('song_votes', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('artist')
+    )
+    with op.batch_alter_table('artist_stats', schema=None) as batch_op:
+        batch_op.create_index('ix_artist_stats_album_votes_artist', ['album_votes', 'artist'], unique=False)
+        batch_op.create_index('ix_artist_stats_song_votes_artist', ['song_votes', 'artist'], unique=False)
+
+    # Backfill from the existing catalog and vote counters
+    op.execute(
+        "INSERT INTO artist_stats (artist, album_count, song_count, album_votes, song_votes) "
+        "SELECT album.artist, COUNT(*), COALESCE(SUM(songs.song_count), 0), "
+        "COALESCE(SUM(album.vote_count), 0), COALESCE(SUM(songs.song_votes), 0) "
+        "FROM album LEFT OUTER JOIN ("
+        "SELECT album_id, COUNT(*) AS song_count, SUM(vote_count) AS song_votes "
+        "FROM song GROUP BY album_id"
+        ") AS songs ON songs.album_id = album.id "
+        "GROUP BY album.artist"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('artist_stats', schema=None) as batch_op:
+        batch_op.drop_index('ix_artist_stats_song_votes_artist')
+        batch_op.drop_index('ix_artist_stats_album_votes_artist')
+
+    op.drop_table('artist_stats')
@@ -0,0 +1,42 @@
+"""Add denormalized vote_count columns.
+
+Revision ID: a30494dc812b
+Revises: 8c05e5c2a3d1
+Create Date: 2025-10-20 10:02:11.482913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a30494dc812b'
+down_revision = '8c05e5c2a3d1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('album', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('vote_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('song', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('vote_count', sa.Integer(), server_default='0', nullable=False))
+
+    # Backfill the counters from the association tables
+    op.execute(
+        'UPDATE album SET vote_count = '
+        '(SELECT COUNT(*) FROM album_votes WHERE album_votes.album_id = album.id)'
+    )
+    op.execute(
+        'UPDATE song SET vote_count = '
+        '(SELECT COUNT(*) FROM song_votes WHERE song_votes.song_id = song.id)'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('song', schema=None) as batch_op:
+        batch_op.drop_column('vote_count')
+
+    with op.batch_alter_table('album', schema=None) as batch_op:
+        batch_op.drop_column('vote_count')
@@ -0,0 +1,50 @@
+"""Index album_votes and song_votes by target.
+
+Revision ID: b7c41e9d2f63
+Revises: 5d2e8f0b7a14
+Create Date: 2025-10-29 10:48:03.772519
+
+The composite primary keys lead with user_id, so "votes for album X",
+reconcile-votes and deleting an album's votes could not use them.
+song.album_id is already the leading column of the listing indexes from
+ec38edb56238.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c41e9d2f63'
+down_revision = '5d2e8f0b7a14'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('album_votes', 'ix_album_votes_album_id_user_id', 'album_id', 'album'),
+    ('song_votes', 'ix_song_votes_song_id_user_id', 'song_id', 'song'),
+]
+
+
+def upgrade():
+    for table, index, column, _ in INDEXES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.create_index(index, [column, 'user_id'], unique=False)
+
+
+def downgrade():
+    bind = op.get_bind()
+    for table, index, column, referent in INDEXES:
+        if bind.dialect.name == 'mysql':
+            # InnoDB uses the new index for the foreign key and refuses to
+            # drop it; recreating the constraint brings back its own index
+            fk = next(
+                fk for fk in sa.inspect(bind).get_foreign_keys(table)
+                if fk['constrained_columns'] == [column]
+            )
+            op.drop_constraint(fk['name'], table, type_='foreignkey')
+            op.drop_index(index, table_name=table)
+            op.create_foreign_key(fk['name'], table, referent, [column], ['id'])
+        else:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.drop_index(index)
@@ -0,0 +1,51 @@
+"""Cascade album and song deletes to songs and votes in the database.
+
+Revision ID: e4a9c03b6d51
+Revises: b7c41e9d2f63
+Create Date: 2025-10-30 16:21:37.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4a9c03b6d51'
+down_revision = 'b7c41e9d2f63'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table); the initial migration left these unnamed
+FOREIGN_KEYS = [
+    ('song', 'album_id', 'album'),
+    ('album_votes', 'album_id', 'album'),
+    ('song_votes', 'song_id', 'song'),
+]
+
+# Names SQLite batch mode gives the reflected, unnamed constraints
+NAMING = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _recreate_foreign_keys(ondelete):
+    bind = op.get_bind()
+    for table, column, referent in FOREIGN_KEYS:
+        if bind.dialect.name == 'sqlite':
+            name = f'fk_{table}_{column}_{referent}'
+            with op.batch_alter_table(table, schema=None, naming_convention=NAMING) as batch_op:
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(name, referent, [column], ['id'], ondelete=ondelete)
+        else:
+            name = next(
+                fk['name'] for fk in sa.inspect(bind).get_foreign_keys(table)
+                if fk['constrained_columns'] == [column]
+            )
+            op.drop_constraint(name, table, type_='foreignkey')
+            op.create_foreign_key(name, table, referent, [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    _recreate_foreign_keys('CASCADE')
+
+
+def downgrade():
+    _recreate_foreign_keys(None)
@@ -0,0 +1,40 @@
+"""Add covering indexes for paginated listings.
+
+Revision ID: ec38edb56238
+Revises: a30494dc812b
+Create Date: 2025-10-21 14:37:52.106344
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ec38edb56238'
+down_revision = 'a30494dc812b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('album', schema=None) as batch_op:
+        batch_op.create_index('ix_album_title_id', ['title', 'id'], unique=False)
+        batch_op.create_index('ix_album_artist_id', ['artist', 'id'], unique=False)
+        batch_op.create_index('ix_album_vote_count_id', ['vote_count', 'id'], unique=False)
+
+    with op.batch_alter_table('song', schema=None) as batch_op:
+        batch_op.create_index('ix_song_album_id_id', ['album_id', 'id'], unique=False)
+        batch_op.create_index('ix_song_album_id_title_id', ['album_id', 'title', 'id'], unique=False)
+        batch_op.create_index('ix_song_album_id_vote_count_id', ['album_id', 'vote_count', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('song', schema=None) as batch_op:
+        batch_op.drop_index('ix_song_album_id_vote_count_id')
+        batch_op.drop_index('ix_song_album_id_title_id')
+        batch_op.drop_index('ix_song_album_id_id')
+
+    with op.batch_alter_table('album', schema=None) as batch_op:
+        batch_op.drop_index('ix_album_vote_count_id')
+        batch_op.drop_index('ix_album_artist_id')
+        batch_op.drop_index('ix_album_title_id')
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask_jwt_extended import create_access_token  # noqa: E402
+from config import Config  # noqa: E402
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.models import User  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + str(tmp_path / "test.db")
+        SECRET_KEY = JWT_SECRET_KEY = "test-secret-key-test-secret-key-test"
+        BCRYPT_LOG_ROUNDS = 4
+
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+        for username, is_admin in (("admin", True), ("user", False)):
+            user = User(username=username, is_admin=is_admin)
+            user.set_password("password")
+            db.session.add(user)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def auth_header(app, username):
+    with app.app_context():
+        user = User.query.filter_by(username=username).one()
+        token = create_access_token(
+            identity=str(user.id), additional_claims={"is_admin": user.is_admin}
+        )
+    return {"Authorization": "Bearer " + token}
+
+
+@pytest.fixture
+def admin_headers(app):
+    return auth_header(app, "admin")
+
+
+@pytest.fixture
+def user_headers(app):
+    return auth_header(app, "user")
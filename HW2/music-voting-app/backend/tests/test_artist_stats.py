@@ -0,0 +1,29 @@
+from sqlalchemy import select
+
+from app.artist_stats import count_votes, rebuild_artist_stats
+from app.extensions import db
+from app.models import Album, ArtistStats, Song
+from app.profiling import query_profiler
+
+
+def test_count_votes_is_one_statement_for_many_artists(app):
+    with app.app_context():
+        albums = [Album(title=f"Album {i}", artist=f"Artist {i % 20}") for i in range(40)]
+        db.session.add_all(albums)
+        db.session.flush()
+        songs = [Song(title="Track", album_id=album.id) for album in albums]
+        db.session.add_all(songs)
+        db.session.flush()
+        rebuild_artist_stats()
+
+        with query_profiler.query_budget(1):
+            count_votes("song", [song.id for song in songs], 1)
+        with query_profiler.query_budget(1):
+            count_votes("album", [albums[0].id, albums[20].id], -1)
+
+        totals = dict(
+            db.session.execute(select(ArtistStats.artist, ArtistStats.song_votes)).all()
+        )
+        assert totals == {f"Artist {i}": 2 for i in range(20)}
+        assert db.session.get(ArtistStats, "Artist 0").album_votes == -2
+        assert db.session.get(ArtistStats, "Artist 1").album_votes == 0
@@ -0,0 +1,45 @@
+import pickle
+
+from app.cache import RedisBackend, ResponseCache
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode("utf8") if isinstance(value, str) else value
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+def test_entries_round_trip_as_json():
+    client = FakeRedis()
+    backend = RedisBackend(client)
+    entry = {"body": b"\x00\xff[]", "etag": "abc", "headers": {"Content-Type": "application/json"}}
+    backend.set("k", entry)
+    assert backend.get("k") == entry
+    assert b"\x80" not in client.data["music-voting:k"]  # not a pickle
+
+
+def test_pickled_values_are_not_loaded():
+    client = FakeRedis()
+    client.data["music-voting:k"] = pickle.dumps({"body": b"x", "etag": "e", "headers": {}})
+    assert RedisBackend(client).get("k") is None
+
+
+def test_shared_backend_serves_cached_responses(app, client):
+    cache = app.extensions["response_cache"]
+    shared = RedisBackend(FakeRedis())
+    cache.init_app(app, backend=shared)
+    first = client.get("/api/albums")
+    cache.local.clear()
+    second = client.get("/api/albums")
+    assert second.status_code == 200
+    assert second.data == first.data
+    assert second.headers["ETag"] == first.headers["ETag"]
@@ -0,0 +1,84 @@
+import io
+
+import pytest
+
+from app.catalog_import import CatalogImportError, read_jsonl
+from app.models import Album, Song
+
+
+def post_import(client, headers, body):
+    return client.post(
+        "/api/albums/import",
+        headers=headers,
+        data=io.BytesIO(body.encode("utf8")),
+        content_type="application/x-ndjson",
+    )
+
+
+def test_read_jsonl_accepts_titles_and_objects():
+    records = list(read_jsonl(['{"title": "A", "artist": "B", "songs": ["X", {"title": "Y"}]}']))
+    assert records == [{"title": "A", "artist": "B", "cover_image_url": None, "songs": ["X", "Y"]}]
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "[1, 2]",
+        '"just a string"',
+        '{"title": 5, "artist": "B"}',
+        '{"title": "A", "artist": ["B"]}',
+        '{"title": "A", "artist": "B", "songs": "Hello"}',
+        '{"title": "A", "artist": "B", "songs": [1]}',
+        '{"title": "A", "artist": "B", "songs": [{"title": 7}]}',
+    ],
+)
+def test_read_jsonl_rejects_malformed_records(line):
+    with pytest.raises(CatalogImportError, match="Line 1"):
+        list(read_jsonl([line]))
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        "[1, 2]\n",
+        '{"title": 5, "artist": "B"}\n',
+        '{"title": "A", "artist": "B", "songs": "Hello"}\n',
+    ],
+)
+def test_import_route_returns_400_for_malformed_jsonl(app, client, admin_headers, body):
+    response = post_import(client, admin_headers, body)
+    assert response.status_code == 400
+    assert response.get_json()["msg"].startswith("Line 1:")
+    with app.app_context():
+        assert Album.query.count() == 0
+        assert Song.query.count() == 0
+
+
+def test_import_route_imports_songs(app, client, admin_headers):
+    response = post_import(client, admin_headers, '{"title": "A", "artist": "B", "songs": ["Hello"]}\n')
+    assert response.status_code == 201
+    assert response.get_json()["songs"] == 1
+    with app.app_context():
+        assert [song.title for song in Song.query] == ["Hello"]
+
+
+def test_bad_line_after_committed_batches_reports_what_got_in(app, client, admin_headers):
+    body = (
+        '{"title": "A", "artist": "X", "songs": ["1"]}\n'
+        '{"title": "B", "artist": "X", "songs": ["2"]}\n'
+        '{"title": "C", "artist": 5}\n'
+    )
+    response = client.post(
+        "/api/albums/import?batch_size=1",
+        headers=admin_headers,
+        data=io.BytesIO(body.encode("utf8")),
+        content_type="application/x-ndjson",
+    )
+    assert response.status_code == 400
+    data = response.get_json()
+    assert data["line"] == 3
+    assert data["imported"]["albums"] == 2
+    assert data["imported"]["songs"] == 2
+    assert data["imported"]["batches"] == 2
+    with app.app_context():
+        assert Album.query.count() == 2
@@ -0,0 +1,41 @@
+import sqlite3
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app.db_pool import PoolMetrics, TimedQueuePool
+
+
+def make_engine(creator, **options):
+    engine = create_engine(
+        "sqlite://", creator=creator, poolclass=TimedQueuePool, **options
+    )
+    metrics = PoolMetrics()
+    metrics.init_engine(engine)
+    return engine, metrics
+
+
+def test_exhausted_pool_counts_a_timeout():
+    engine, metrics = make_engine(
+        lambda: sqlite3.connect(":memory:", check_same_thread=False),
+        pool_size=1, max_overflow=0, pool_timeout=0.01,
+    )
+    with engine.connect():
+        with pytest.raises(PoolTimeout):
+            engine.connect()
+    snapshot = metrics.snapshot()
+    assert snapshot["timeouts"] == 1
+    assert snapshot["connect_errors"] == 0
+
+
+def test_failed_connect_is_not_a_timeout():
+    def refuse():
+        raise sqlite3.OperationalError("connection refused")
+
+    engine, metrics = make_engine(refuse, pool_size=1, max_overflow=0)
+    with pytest.raises(Exception):
+        engine.connect()
+    snapshot = metrics.snapshot()
+    assert snapshot["timeouts"] == 0
+    assert snapshot["connect_errors"] == 1
@@ -0,0 +1,34 @@
+import threading
+import time
+
+from app.leaderboard import Leaderboard, RankedSet
+
+
+def test_from_items_matches_incremental_sets():
+    items = [(key, (key * 7) % 5) for key in range(50)]
+    incremental = RankedSet()
+    for key, score in items:
+        incremental.set(key, score)
+    assert RankedSet.from_items(items).top(None) == incremental.top(None)
+
+
+def test_stale_snapshot_is_rebuilt_by_one_reader(monkeypatch):
+    board = Leaderboard()
+    board.refresh_seconds = 0
+    board._built_at = time.monotonic() - 1  # stale, but readable
+    rebuilds = []
+
+    def slow_rebuild():
+        rebuilds.append(1)
+        time.sleep(0.2)
+        board._built_at = time.monotonic() + 60
+
+    monkeypatch.setattr(board, "rebuild", slow_rebuild)
+    readers = [threading.Thread(target=board.top_albums, args=(10,)) for _ in range(8)]
+    started = time.monotonic()
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    assert len(rebuilds) == 1
+    assert time.monotonic() - started < 1
@@ -0,0 +1,63 @@
+import pytest
+
+
+@pytest.fixture
+def album(client, admin_headers):
+    """An album with two songs; returns (album id, [song ids])."""
+    album_id = client.post(
+        "/api/albums", headers=admin_headers, json={"title": "A", "artist": "B"}
+    ).get_json()["id"]
+    song_ids = [
+        client.post(
+            f"/api/albums/{album_id}/songs", headers=admin_headers, json={"title": title}
+        ).get_json()["id"]
+        for title in ("X", "Y")
+    ]
+    return album_id, song_ids
+
+
+def vote_everything(client, headers, album_id, song_ids):
+    assert client.post(f"/api/vote/album/{album_id}", headers=headers).status_code == 200
+    for song_id in song_ids:
+        assert client.post(f"/api/vote/song/{song_id}", headers=headers).status_code == 200
+    # Fill the /my-votes cache
+    votes = client.get("/api/my-votes", headers=headers).get_json()
+    assert votes["voted_albums"] == [album_id]
+    assert votes["voted_songs"] == song_ids
+
+
+def test_deleting_an_album_refreshes_my_votes(client, admin_headers, user_headers, album):
+    album_id, song_ids = album
+    vote_everything(client, user_headers, album_id, song_ids)
+
+    assert client.delete(f"/api/albums/{album_id}", headers=admin_headers).status_code == 200
+
+    votes = client.get("/api/my-votes", headers=user_headers).get_json()
+    assert votes["voted_albums"] == []
+    assert votes["voted_songs"] == []
+
+
+def test_deleting_a_song_refreshes_my_votes(client, admin_headers, user_headers, album):
+    album_id, song_ids = album
+    vote_everything(client, user_headers, album_id, song_ids)
+
+    assert client.delete(f"/api/songs/{song_ids[0]}", headers=admin_headers).status_code == 200
+
+    votes = client.get("/api/my-votes", headers=user_headers).get_json()
+    assert votes["voted_albums"] == [album_id]
+    assert votes["voted_songs"] == song_ids[1:]
+
+
+def test_album_delete_cost_does_not_depend_on_voters(
+    app, client, admin_headers, user_headers, album, monkeypatch
+):
+    album_id, song_ids = album
+    vote_everything(client, user_headers, album_id, song_ids)
+    vote_everything(client, admin_headers, album_id, song_ids)
+
+    invalidated = []
+    cache = app.extensions["response_cache"]
+    monkeypatch.setattr(cache, "invalidate", lambda *tags: invalidated.extend(tags))
+    assert client.delete(f"/api/albums/{album_id}", headers=admin_headers).status_code == 200
+    assert not any(tag.startswith("user:") for tag in invalidated)
+    assert invalidated.count("my-votes") == 1
@@ -0,0 +1,22 @@
+import pytest
+
+from app.pagination import encode_cursor
+
+
+@pytest.mark.parametrize(
+    "values",
+    [[1, {"x": 1}], [[1], 2], [None, None], ["a", "1"], [True, 1], ["a", 1.5]],
+)
+@pytest.mark.parametrize("sort", ["id", "title", "-vote_count"])
+def test_malformed_cursor_is_rejected(client, values, sort):
+    response = client.get(f"/api/albums?sort={sort}&cursor={encode_cursor(values)}")
+    assert response.status_code == 400
+
+
+def test_cursor_pages_through_albums(client, admin_headers):
+    for title in ("A", "B", "C"):
+        client.post("/api/albums", headers=admin_headers, json={"title": title, "artist": "X"})
+    first = client.get("/api/albums?sort=title&limit=2")
+    second = client.get(f"/api/albums?sort=title&limit=2&cursor={first.headers['X-Next-Cursor']}")
+    assert second.status_code == 200
+    assert [album["title"] for album in second.get_json()] == ["C"]
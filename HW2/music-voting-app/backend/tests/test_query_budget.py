@@ -0,0 +1,77 @@
+import pytest
+
+from app.profiling import query_profiler
+
+ALBUMS = 10
+SONGS_PER_ALBUM = 5
+
+
+@pytest.fixture
+def catalog(app, client, admin_headers):
+    """ALBUMS albums of SONGS_PER_ALBUM songs, every one voted for by admin.
+
+    Returns (album ids, song ids). The response cache is switched off so
+    every request reaches the database; the budgets below must not grow
+    with the number of rows.
+    """
+    app.extensions["response_cache"].enabled = False
+    album_ids, song_ids = [], []
+    for i in range(ALBUMS):
+        album_id = client.post(
+            "/api/albums", headers=admin_headers, json={"title": f"A{i}", "artist": f"B{i % 3}"}
+        ).get_json()["id"]
+        album_ids.append(album_id)
+        client.post(f"/api/vote/album/{album_id}", headers=admin_headers)
+        for j in range(SONGS_PER_ALBUM):
+            song_id = client.post(
+                f"/api/albums/{album_id}/songs", headers=admin_headers, json={"title": f"S{j}"}
+            ).get_json()["id"]
+            song_ids.append(song_id)
+            client.post(f"/api/vote/song/{song_id}", headers=admin_headers)
+    return album_ids, song_ids
+
+
+def test_album_listing(client, catalog):
+    with query_profiler.query_budget(1):
+        response = client.get("/api/albums")
+    assert len(response.get_json()) == ALBUMS
+
+
+def test_album_details(client, catalog):
+    album_ids, _ = catalog
+    with query_profiler.query_budget(2):
+        response = client.get(f"/api/albums/{album_ids[0]}")
+    assert len(response.get_json()["songs"]) == SONGS_PER_ALBUM
+
+
+def test_single_votes(client, user_headers, catalog):
+    album_ids, song_ids = catalog
+    # One extra for the first lookup of the user behind the token
+    with query_profiler.query_budget(6):
+        assert client.post(f"/api/vote/album/{album_ids[0]}", headers=user_headers).status_code == 200
+    with query_profiler.query_budget(5):
+        assert client.post(f"/api/vote/album/{album_ids[0]}", headers=user_headers).status_code == 200
+    # Plus one to find the song's album for the leaderboard
+    with query_profiler.query_budget(6):
+        assert client.post(f"/api/vote/song/{song_ids[0]}", headers=user_headers).status_code == 200
+
+
+def test_vote_batch(client, user_headers, catalog):
+    album_ids, song_ids = catalog
+    client.post(f"/api/vote/album/{album_ids[0]}", headers=user_headers)
+    client.post(f"/api/vote/song/{song_ids[0]}", headers=user_headers)
+    votes = [{"type": "album", "id": album_id} for album_id in album_ids]
+    votes += [{"type": "song", "id": song_id} for song_id in song_ids]
+    # Per kind: lookup, current votes, delete, decrement, stats, insert,
+    # increment, stats, new counts; plus the songs' albums for the leaderboard
+    with query_profiler.query_budget(19):
+        response = client.post("/api/vote/batch", headers=user_headers, json={"votes": votes})
+    assert response.status_code == 200
+    assert len(response.get_json()["results"]) == ALBUMS * (1 + SONGS_PER_ALBUM)
+
+
+def test_my_votes(client, admin_headers, catalog):
+    # admin's user row is already cached by the catalog requests
+    with query_profiler.query_budget(2):
+        response = client.get("/api/my-votes", headers=admin_headers)
+    assert len(response.get_json()["voted_songs"]) == ALBUMS * SONGS_PER_ALBUM
@@ -0,0 +1,27 @@
+import pytest
+
+
+@pytest.fixture
+def album_id(client, admin_headers):
+    return client.post(
+        "/api/albums", headers=admin_headers, json={"title": "A", "artist": "B"}
+    ).get_json()["id"]
+
+
+@pytest.mark.parametrize("body", [[1], "votes", 5, None])
+def test_non_object_body_is_rejected(client, user_headers, body):
+    response = client.post("/api/vote/batch", headers=user_headers, json=body)
+    assert response.status_code == 400
+
+
+def test_repeated_target_reports_each_items_count(client, user_headers, album_id):
+    vote = {"type": "album", "id": album_id}
+    response = client.post(
+        "/api/vote/batch", headers=user_headers, json={"votes": [vote, vote, vote]}
+    )
+    assert response.status_code == 200
+    assert [(r["voted"], r["vote_count"]) for r in response.get_json()["results"]] == [
+        (True, 1),
+        (False, 0),
+        (True, 1),
+    ]
@@ -0,0 +1,54 @@
+import json
+import os
+
+import pytest
+
+from app.vote_queue import VoteQueue
+
+
+@pytest.fixture
+def queue(app, tmp_path):
+    app.config["VOTE_JOURNAL_DIR"] = str(tmp_path / "journal")
+    queue = VoteQueue()
+    queue.init_app(app)
+    queue._take_ownership()
+    yield queue
+    queue._release_ownership(remove=True)
+
+
+def write_journal(queue, owner, toggles):
+    with open(queue._path(".jsonl", owner), "w", encoding="utf8") as f:
+        for toggle in toggles:
+            f.write(json.dumps(toggle) + "\n")
+
+
+def recover(app, queue):
+    with app.app_context():
+        return queue._recover()
+
+
+def test_journal_of_a_running_process_is_left_alone(app, queue):
+    # Same pid as this process, like a restarted container reusing pid 1
+    owner = f"{os.getpid()}-other"
+    write_journal(queue, owner, [[1, "album", 1]])
+    fd = queue._try_lock(queue._path(".lock", owner))
+    try:
+        assert recover(app, queue) == []
+        assert os.path.exists(queue._path(".jsonl", owner))
+    finally:
+        os.close(fd)
+
+
+def test_journal_of_a_dead_process_is_recovered_despite_a_live_pid(app, queue):
+    owner = f"{os.getpid()}-crashed"
+    write_journal(queue, owner, [[1, "album", 1], [2, "song", 3]])
+    open(queue._path(".lock", owner), "w").close()  # nobody holds it
+
+    assert recover(app, queue) == [[1, "album", 1], [2, "song", 3]]
+    assert sorted(os.listdir(queue.journal_dir)) == [f"votes-{queue._owner}.lock"]
+
+
+def test_journal_without_a_lock_file_is_recovered(app, queue):
+    write_journal(queue, "12345", [[1, "album", 1]])
+    assert recover(app, queue) == [[1, "album", 1]]
+    assert not os.path.exists(queue._path(".jsonl", "12345"))
@@ -0,0 +1,22 @@
+import api from './axiosConfig';
+
+// Expand the run-length encoded id list from /my-votes?format=rle:
+// [gap, run, gap, run, ...], each gap measured from the end of the previous run
+export const decodeRuns = (runs) => {
+    const ids = [];
+    let position = 0;
+    for (let i = 0; i < runs.length; i += 2) {
+        const start = position + runs[i];
+        for (let id = start; id < start + runs[i + 1]; id++) ids.push(id);
+        position = start + runs[i + 1];
+    }
+    return ids;
+};
+
+export const fetchMyVotes = async () => {
+    const { data } = await api.get('/my-votes', { params: { format: 'rle' } });
+    return {
+        voted_albums: decodeRuns(data.voted_albums),
+        voted_songs: decodeRuns(data.voted_songs),
+    };
+};
@@ -0,0 +1,13 @@
+import api from './axiosConfig';
+
+// Follow the X-Next-Cursor header until every page of a listing is loaded
+export const fetchAllPages = async (url, params = {}) => {
+    const items = [];
+    let cursor = null;
+    do {
+        const response = await api.get(url, { params: { ...params, cursor: cursor || undefined } });
+        items.push(...response.data);
+        cursor = response.headers['x-next-cursor'];
+    } while (cursor);
+    return items;
+};
@@ -0,0 +1,29 @@
+import { useEffect, useRef } from 'react';
+
+// Subscribe to server-sent vote counts: album counts, or with an albumId the
+// counts of that album and its songs. onVotes gets [{ type, id, vote_count }].
+// onResync runs when the server dropped us for falling behind; EventSource
+// reconnects by itself, so the page only needs to reload its counts.
+export const useVoteStream = (albumId, onVotes, onResync) => {
+    const handlers = useRef({ onVotes, onResync });
+    handlers.current = { onVotes, onResync };
+
+    useEffect(() => {
+        const query = albumId ? `?album_id=${albumId}` : '';
+        const source = new EventSource(`${import.meta.env.VITE_API_BASE_URL}/live/votes${query}`);
+        source.addEventListener('votes', (event) => {
+            handlers.current.onVotes(JSON.parse(event.data));
+        });
+        source.addEventListener('dropped', () => {
+            if (handlers.current.onResync) handlers.current.onResync();
+        });
+        return () => source.close();
+    }, [albumId]);
+};
+
+// Apply streamed counts of the given type to a list of { id, vote_count } items
+export const applyVoteCounts = (items, updates, type) => {
+    const counts = new Map(updates.filter(u => u.type === type).map(u => [u.id, u.vote_count]));
+    if (counts.size === 0) return items;
+    return items.map(item => (counts.has(item.id) ? { ...item, vote_count: counts.get(item.id) } : item));
+};
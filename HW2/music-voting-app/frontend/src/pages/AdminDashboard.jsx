@@ -27,11 +27,11 @@ const AdminDashboard = () => {
   // Fetch all albums on component mount
   const fetchAlbums = async () => {
     try {
-      const response = await api.get("/albums");
-      const albumsWithDetails = await Promise.all(
-        response.data.map((album) => api.get(`/albums/${album.id}`)),
-      );
-      setAlbums(albumsWithDetails.map((res) => res.data));
+      // One request returns every album together with its songs
+      const response = await api.get("/catalog", {
+        params: { include: "songs" },
+      });
+      setAlbums(response.data);
     } catch (error) {
       console.error("Failed to fetch albums:", error);
     }
@@ -1,6 +1,9 @@
 import React, { useState, useEffect, useContext } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import api from '../api/axiosConfig';
+import { fetchAllPages } from '../api/pagination';
+import { useVoteStream, applyVoteCounts } from '../api/voteStream';
+import { fetchMyVotes } from '../api/myVotes';
 import { AuthContext } from '../context/AuthContext.jsx';
 
 const AlbumDetail = () => {
@@ -15,12 +18,10 @@ const AlbumDetail = () => {
         try {
             setError('');
             setLoading(true);
-            const songsResponse = await api.get(`/albums/${albumId}/songs`);
-            setSongs(songsResponse.data);
+            setSongs(await fetchAllPages(`/albums/${albumId}/songs`));
 
             if (user) {
-                const votesResponse = await api.get('/my-votes');
-                setMyVotes(votesResponse.data);
+                setMyVotes(await fetchMyVotes());
             }
         } catch (err) {
             console.error("Error fetching album details:", err);
@@ -35,15 +36,31 @@ const AlbumDetail = () => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
     }, [albumId, user]); // Refetch if the album ID or user changes
 
+    // Live song counts for this album
+    useVoteStream(
+        albumId,
+        (updates) => setSongs(prev => applyVoteCounts(prev, updates, 'song')),
+        () => fetchData(),
+    );
+
     const handleVote = async (songId) => {
         if (!user) {
             alert("Please log in to vote.");
             return;
         }
         try {
-            await api.post(`/vote/song/${songId}`);
-            // Refetch data to instantly update vote counts and button state
-            fetchData();
+            const response = await api.post(`/vote/song/${songId}`);
+            const { voted, vote_count } = response.data;
+            // The vote response carries the new state, so no refetch is needed
+            setSongs(prev => prev.map(song => (
+                song.id === songId ? { ...song, vote_count } : song
+            )));
+            setMyVotes(prev => ({
+                ...prev,
+                voted_songs: voted
+                    ? [...prev.voted_songs, songId]
+                    : prev.voted_songs.filter(id => id !== songId),
+            }));
         } catch (error) {
             console.error("Error voting for song:", error);
             alert("Your vote could not be cast. Please try again.");
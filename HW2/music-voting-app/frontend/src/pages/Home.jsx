@@ -1,17 +1,22 @@
 import React, { useState, useEffect, useContext } from 'react';
 import api from '../api/axiosConfig';
+import { useVoteStream, applyVoteCounts } from '../api/voteStream';
+import { fetchMyVotes as loadMyVotes } from '../api/myVotes';
 import { AuthContext } from '../context/AuthContext';
 import { Link } from 'react-router-dom';
 
 const Home = () => {
     const [albums, setAlbums] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null);
     const [myVotes, setMyVotes] = useState({ voted_albums: [] });
     const { user } = useContext(AuthContext);
 
-    const fetchAlbums = async () => {
+    // Pass a cursor to append the next page instead of starting over
+    const fetchAlbums = async (cursor = null) => {
         try {
-            const response = await api.get('/albums');
-            setAlbums(response.data);
+            const response = await api.get('/albums', { params: { cursor: cursor || undefined } });
+            setAlbums(prev => (cursor ? [...prev, ...response.data] : response.data));
+            setNextCursor(response.headers['x-next-cursor'] || null);
         } catch (error) {
             console.error("Error fetching albums:", error);
         }
@@ -20,8 +25,7 @@ const Home = () => {
     const fetchMyVotes = async () => {
         if (user) {
             try {
-                const response = await api.get('/my-votes');
-                setMyVotes(response.data);
+                setMyVotes(await loadMyVotes());
             } catch (error) {
                 console.error("Error fetching my votes:", error);
             }
@@ -34,16 +38,31 @@ const Home = () => {
     // eslint-disable-next-line react-hooks/exhaustive-deps
     }, [user]);
 
+    // Live counts from other voters, applied to the loaded pages
+    useVoteStream(
+        null,
+        (updates) => setAlbums(prev => applyVoteCounts(prev, updates, 'album')),
+        () => fetchAlbums(),
+    );
+
     const handleVote = async (albumId) => {
         if (!user) {
             alert("Please log in to vote.");
             return;
         }
         try {
-            await api.post(`/vote/album/${albumId}`);
-            // Refetch data to update UI
-            fetchAlbums();
-            fetchMyVotes();
+            const response = await api.post(`/vote/album/${albumId}`);
+            const { voted, vote_count } = response.data;
+            // Apply the new state in place so the loaded pages are kept
+            setAlbums(prev => prev.map(album => (
+                album.id === albumId ? { ...album, vote_count } : album
+            )));
+            setMyVotes(prev => ({
+                ...prev,
+                voted_albums: voted
+                    ? [...prev.voted_albums, albumId]
+                    : prev.voted_albums.filter(id => id !== albumId),
+            }));
         } catch (error) {
             console.error("Error voting:", error);
         }
@@ -74,6 +93,11 @@ const Home = () => {
                     </div>
                 ))}
             </div>
+            {nextCursor && (
+                <div className="text-center mt-6">
+                    <button onClick={() => fetchAlbums(nextCursor)} className="btn btn-outline">Load More</button>
+                </div>
+            )}
         </div>
     );
 };
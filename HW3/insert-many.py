@@ -1,32 +1,293 @@
+"""Bulk-load jokes into MongoDB from JSONL or CSV files.
+
+    python insert-many.py jokes.jsonl more.csv
+    python insert-many.py jokes.jsonl --batch-size 2000 --workers 8 --uri mongodb+srv://...
+    cat jokes.jsonl | python insert-many.py - --format jsonl
+
+Each JSONL line or CSV row needs `content` and `author_username` (or pass
+--default-author); an `_id` given as a 24-digit hex string or {"$oid": ...}
+is kept. Records are read, validated and normalized one at a time, grouped
+into insert_many(ordered=False) batches and several batches are written at
+once, so memory stays flat however big the input is.
+
+Records without an _id get one derived from the run's start time and the
+record's position, so re-sending a batch cannot create copies: those
+documents come back as duplicate key errors, which are counted and skipped
+rather than failing the load. Progress is saved to a checkpoint file after
+every batch; if the load stops (network failure, Ctrl-C), run the same
+command again and it carries on after the last record known to be stored.
+The checkpoint is removed once everything is in.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+
+from bson.objectid import ObjectId
 from pymongo import MongoClient
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+DUPLICATE_KEY = 11000
+
+
+# --- Reading and normalizing ---
+
+
+def read_records(path, fmt):
+    """Yield (record number, record) for a file; record is a dict or an error string."""
+    source = nullcontext(sys.stdin) if path == "-" else open(path, encoding="utf-8-sig", newline="")
+    with source as f:
+        if fmt == "csv":
+            for number, row in enumerate(csv.DictReader(f), 1):
+                yield number, row
+            return
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                yield number, f"invalid JSON ({exc})"
+                continue
+            yield number, record if isinstance(record, dict) else "not a JSON object"
+
+
+def normalize(record, default_author, max_length):
+    """Return (document, None) for a valid record or (None, reason) otherwise."""
+    if isinstance(record, str):
+        return None, record
+
+    content = record.get("content")
+    if not isinstance(content, str):
+        return None, "missing content"
+    # Same text however it was typed or exported: NFC, \n line ends, trimmed
+    content = unicodedata.normalize("NFC", content).replace("\r\n", "\n").replace("\r", "\n")
+    content = "\n".join(line.rstrip() for line in content.split("\n")).strip()
+    if not content:
+        return None, "empty content"
+    if len(content) > max_length:
+        return None, f"content longer than {max_length} characters"
+
+    author = record.get("author_username") or default_author
+    if not isinstance(author, str) or not 3 <= len(author.strip()) <= 50:
+        # The app only lets usernames of 3 to 50 characters register
+        return None, "author_username must be 3 to 50 characters"
+
+    doc = {"content": content, "author_username": author.strip()}
+    if record.get("_id") not in (None, ""):
+        joke_id = record["_id"]
+        if isinstance(joke_id, dict):
+            joke_id = joke_id.get("$oid")  # mongoexport's extended JSON
+        if not ObjectId.is_valid(joke_id):
+            # The app's edit/delete routes only understand ObjectIds
+            return None, f"_id {record['_id']!r} is not an ObjectId"
+        doc["_id"] = ObjectId(joke_id)
+    return doc, None
+
+
+def record_id(run_started, file_index, number):
+    """Deterministic ObjectId: the run's start time, then file and record number.
+
+    Ids sort in input order, so later records count as newer on the app's
+    newest-first pages.
+    """
+    return ObjectId(
+        run_started.to_bytes(4, "big") + file_index.to_bytes(2, "big") + number.to_bytes(6, "big")
+    )
+
+
+def batches(path, file_index, fmt, args, state, stats):
+    """Yield lists of (record number, document) for one file, batch-size at a time."""
+    done_through = state["files"].get(path, 0)
+    batch = []
+    for number, record in read_records(path, fmt):
+        stats["read"] += 1
+        if number <= done_through:
+            stats["skipped"] += 1
+            continue
+        doc, problem = normalize(record, args.default_author, args.max_length)
+        if problem:
+            stats["rejected"] += 1
+            if stats["rejected"] <= args.show_errors:
+                print(f"{path}:{number}: skipped, {problem}", file=sys.stderr)
+            continue
+        doc.setdefault("_id", record_id(state["started"], file_index, number))
+        batch.append((number, doc))
+        if len(batch) == args.batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# --- Writing ---
+
+
+def insert_batch(collection, docs, retries):
+    """insert_many(ordered=False) with retries on connection errors.
+
+    Returns (inserted, duplicates, other write errors). A retry after a
+    partial write reports the documents that did get in as duplicates.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return len(collection.insert_many(docs, ordered=False).inserted_ids), 0, []
+        except BulkWriteError as exc:
+            errors = exc.details.get("writeErrors", [])
+            duplicates = sum(1 for error in errors if error.get("code") == DUPLICATE_KEY)
+            others = [error for error in errors if error.get("code") != DUPLICATE_KEY]
+            return exc.details.get("nInserted", 0), duplicates, others
+        except AutoReconnect:
+            if attempt == retries:
+                raise
+            time.sleep(2**attempt)
+
+
+class Checkpoint:
+    """Tracks, per file, the last record number below which every batch is stored.
+
+    Batches finish out of order, so the mark only moves past a batch once
+    every batch submitted before it is done too.
+    """
+
+    def __init__(self, path, state):
+        self.path = path
+        self.state = state
+        self._order = deque()  # [file, last record number, done] in submit order
+
+    def submit(self, file_path, last_number):
+        entry = [file_path, last_number, False]
+        self._order.append(entry)
+        return entry
+
+    def finish(self, entry):
+        entry[2] = True
+        moved = False
+        while self._order and self._order[0][2]:
+            file_path, last_number, _ = self._order.popleft()
+            self.state["files"][file_path] = last_number
+            moved = True
+        if moved:
+            self.save()
+
+    def save(self):
+        # Written whole then renamed, so a crash never leaves half a file
+        with open(self.path + ".tmp", "w", encoding="utf8") as f:
+            json.dump(self.state, f)
+        os.replace(self.path + ".tmp", self.path)
+
+
+def report(stats, started, final=False):
+    elapsed = max(time.monotonic() - started, 1e-9)
+    line = (
+        f"{stats['inserted']} inserted, {stats['duplicates']} duplicate, "
+        f"{stats['failed']} failed, {stats['rejected']} rejected, "
+        f"{stats['skipped']} already loaded | {stats['inserted'] / elapsed:,.0f} docs/s"
+    )
+    if final:
+        line = f"Done in {elapsed:.1f}s: {line}"
+    print(line, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("files", nargs="+", help="JSONL or CSV files, or - for stdin")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Input format (default: from the file extension, else jsonl)")
+    parser.add_argument("--uri", default=os.environ.get("MONGO_URI", "mongodb://localhost:27017/"),
+                        help="MongoDB connection string (default: $MONGO_URI or localhost)")
+    parser.add_argument("--db", default="joke_app_db")
+    parser.add_argument("--collection", default="jokes")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4, help="Batches written at once")
+    parser.add_argument("--retries", type=int, default=5,
+                        help="Retries per batch on connection errors, with backoff")
+    parser.add_argument("--default-author", help="author_username for records without one")
+    parser.add_argument("--max-length", type=int, default=5000, help="Longest content accepted")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <first file>.checkpoint)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Discard an existing checkpoint and start a new run "
+                             "(records without an _id are inserted again)")
+    parser.add_argument("--progress", type=float, default=5, help="Seconds between progress lines")
+    parser.add_argument("--show-errors", type=int, default=20,
+                        help="How many rejected records and write errors to print")
+    args = parser.parse_args()
+    args.batch_size = max(1, args.batch_size)
+    args.workers = max(1, args.workers)
+
+    checkpoint_path = args.checkpoint or (
+        "stdin.checkpoint" if args.files[0] == "-" else args.files[0] + ".checkpoint"
+    )
+    state = {"started": int(time.time()), "inputs": args.files, "files": {}}
+    if os.path.exists(checkpoint_path) and not args.restart:
+        with open(checkpoint_path, encoding="utf8") as f:
+            saved = json.load(f)
+        if saved.get("inputs") != args.files:
+            parser.error(f"{checkpoint_path} is for {saved.get('inputs')}; use --restart to discard it")
+        state = saved
+        print(f"Resuming from {checkpoint_path}", file=sys.stderr)
+    checkpoint = Checkpoint(checkpoint_path, state)
+
+    collection = MongoClient(args.uri)[args.db][args.collection]
+    stats = dict.fromkeys(
+        ["read", "skipped", "rejected", "inserted", "duplicates", "failed"], 0
+    )
+    started = last_report = time.monotonic()
+    in_flight = {}
+
+    def collect(futures):
+        nonlocal last_report
+        for future in futures:
+            entry = in_flight.pop(future)
+            inserted, duplicates, errors = future.result()
+            stats["inserted"] += inserted
+            stats["duplicates"] += duplicates
+            stats["failed"] += len(errors)
+            for error in errors:
+                if stats["failed"] <= args.show_errors:
+                    print(f"{entry[0]}: write error {error.get('code')}: {error.get('errmsg')}",
+                          file=sys.stderr)
+            checkpoint.finish(entry)
+        if time.monotonic() - last_report >= args.progress:
+            report(stats, started)
+            last_report = time.monotonic()
+
+    pool = ThreadPoolExecutor(args.workers)
+    try:
+        for file_index, path in enumerate(args.files):
+            fmt = args.format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+            for batch in batches(path, file_index, fmt, args, state, stats):
+                # Bounded read-ahead: never more than two batches per worker in memory
+                if len(in_flight) >= args.workers * 2:
+                    finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(finished)
+                entry = checkpoint.submit(path, batch[-1][0])
+                future = pool.submit(
+                    insert_batch, collection, [doc for _, doc in batch], args.retries
+                )
+                in_flight[future] = entry
+        collect(list(in_flight))
+    except (AutoReconnect, KeyboardInterrupt) as exc:
+        # Batches still queued are dropped; the checkpoint only covers stored ones
+        pool.shutdown(cancel_futures=True)
+        checkpoint.save()
+        report(stats, started)
+        print(f"Stopped ({exc.__class__.__name__}). Run the same command again to resume "
+              f"from {checkpoint_path}.", file=sys.stderr)
+        sys.exit(1)
+
+    pool.shutdown()
+    report(stats, started, final=True)
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    sys.exit(1 if stats["failed"] else 0)
+
 
-# Connect to MongoDB
-client = MongoClient("mongodb://localhost:27017/")  # Adjust as necessary
-db = client["joke_app_db"]  # Replace with your database name
-collection = db["jokes"]  # Replace with your collection name
-
-# Sample documents to insert
-documents = [
-    {
-        "_id": "68f5e4d49d543851baafb3b1",
-        "content": "Why did the melon jump into the lake? It wanted to be a water-melon.",
-        "author_username": "samko5sam",
-    },
-    # Add more documents as needed
-    {
-        "_id": "another_id_12345",
-        "content": "What did the grape do when it got stepped on? Nothing, it just let out a little wine.",
-        "author_username": "user2",
-    },
-    {
-        "_id": "yet_another_id_67890",
-        "content": "Why do seagulls fly over the ocean? Because if they flew over the bay, they'd be bagels.",
-        "author_username": "user3",
-    },
-]
-
-# Insert multiple documents
-insert_result = collection.insert_many(documents)
-
-# Print the inserted IDs
-print("Inserted IDs:", insert_result.inserted_ids)
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,19 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, jsonify, flash
-from pymongo import MongoClient, DESCENDING, UpdateOne
+from flask import (
+    Flask,
+    Response,
+    render_template,
+    stream_template,
+    request,
+    redirect,
+    url_for,
+    jsonify,
+    flash,
+    get_flashed_messages,
+)
+from pymongo import MongoClient, ASCENDING, DESCENDING, UpdateOne
 from pymongo.errors import BulkWriteError
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import (
@@ -13,7 +25,11 @@ from flask_login import (
     current_user,
 )
 from dotenv import load_dotenv
+import click
 import requests
+from indexes import ensure_indexes, plan_problems, undeclared_indexes
+from joke_pool import JokePool
+from seen_filter import SeenFilter
 
 load_dotenv()
 
@@ -30,8 +46,26 @@ db = client.joke_app_db  # Database name
 jokes_collection = db.jokes
 users_collection = db.users
 
-# Ensure the username is unique
-users_collection.create_index("username", unique=True)
+# Create any missing index (unique usernames, jokes by author); a no-op once they exist
+ensure_indexes(db)
+
+# Only what the joke cards render, so user pages fetch less
+JOKE_FIELDS = {"content": 1, "author_username": 1}
+
+# Random jokes are served from an in-memory buffer refilled in $sample batches
+joke_pool = JokePool(
+    jokes_collection,
+    size=int(os.environ.get("JOKE_POOL_SIZE", 500)),
+    batch=int(os.environ.get("JOKE_POOL_BATCH", 200)),
+    low_water=int(os.environ.get("JOKE_POOL_LOW_WATER", 100)),
+    max_age=int(os.environ.get("JOKE_POOL_MAX_AGE", 300)),
+)
+MAX_JOKES_PER_REQUEST = 20
+
+# User and manage pages are paged by _id (?before= / ?after=, ?limit=)
+JOKES_PER_PAGE = int(os.environ.get("JOKES_PER_PAGE", 20))
+MAX_JOKES_PER_PAGE = 100
+PAGE_ARGS = ("before", "after", "limit")
 
 
 # --- User Authentication Setup (Flask-Login) ---
@@ -70,11 +104,15 @@ def verify_hcaptcha(secret_key, response_token):
 
 @app.route("/")
 def index():
-    """Home page: Renders one initial joke."""
-    # Fetch one random joke using MongoDB's aggregation pipeline
-    pipeline = [{"$sample": {"size": 5}}]
-    initial_jokes = list(jokes_collection.aggregate(pipeline))
-    return render_template("index.html", initial_jokes=initial_jokes)
+    """Home page: Renders the first few random jokes."""
+    initial_jokes = joke_pool.take(5)
+    # The scroll script passes this back so these jokes are not shown again
+    seen = SeenFilter()
+    for joke in initial_jokes:
+        seen.add(joke["_id"])
+    return render_template(
+        "index.html", initial_jokes=initial_jokes, seen_token=seen.to_token()
+    )
 
 
 @app.route("/login", methods=["GET", "POST"])
@@ -175,37 +213,99 @@ def post_joke():
     return render_template("post_joke.html")
 
 
+def author_jokes(username, before=None, after=None):
+    """An author's jokes, served by the author_username/_id index.
+
+    Newest first, starting below `before` if given; with `after` it walks
+    the other way, oldest first from just above that id.
+    """
+    query = {"author_username": username}
+    if before is not None:
+        query["_id"] = {"$lt": before}
+    elif after is not None:
+        query["_id"] = {"$gt": after}
+    direction = ASCENDING if after is not None else DESCENDING
+    return jokes_collection.find(query, JOKE_FIELDS).sort("_id", direction)
+
+
+def author_jokes_page(username, args):
+    """One page of an author's jokes, newest first, from the request args.
+
+    Returns (jokes, pager). pager["older"] and pager["newer"] are the ids
+    the next/previous links pass as ?before= and ?after= (None at either
+    end), so a page stays put when jokes are posted or deleted elsewhere.
+    Raises InvalidId for a malformed cursor.
+    """
+    before = ObjectId(args["before"]) if args.get("before") else None
+    after = ObjectId(args["after"]) if args.get("after") and before is None else None
+    limit = args.get("limit", JOKES_PER_PAGE, type=int)
+    limit = max(1, min(limit, MAX_JOKES_PER_PAGE))
+
+    # One extra row says whether there is another page in that direction
+    jokes = list(author_jokes(username, before, after).limit(limit + 1))
+    more = len(jokes) > limit
+    jokes = jokes[:limit]
+    if after is not None:
+        jokes.reverse()
+
+    pager = {
+        "older": None,
+        "newer": None,
+        "limit": limit if "limit" in args else None,
+        "paged": before is not None or after is not None,
+    }
+    if jokes:
+        if more or after is not None:
+            pager["older"] = str(jokes[-1]["_id"])
+        if before is not None or (after is not None and more):
+            pager["newer"] = str(jokes[0]["_id"])
+    return jokes, pager
+
+
+def stream_page(template, **context):
+    """Send a rendered page in chunks as the template produces them."""
+    # The session is saved before a streamed body is sent, so pop the flashed
+    # messages now; the template reads them from the request context.
+    get_flashed_messages(with_categories=True)
+    return Response(stream_template(template, **context))
+
+
 @app.route("/user/<username>")
 def user_jokes(username):
-    """Shows a page with all jokes posted by a specific user."""
+    """Shows a page of the jokes posted by a specific user, newest first."""
     # First, check if the user actually exists to provide a better error message
     user = users_collection.find_one({"username": username})
     if not user:
         flash(f'User "{username}" not found.', "error")
         return redirect(url_for("index"))
 
-    # Fetch all jokes by this author, sorted by most recent first
-    # Sorting by '_id' in descending order is a common way to get recent posts
-    user_jokes_cursor = jokes_collection.find({"author_username": username}).sort(
-        "_id", DESCENDING
+    try:
+        jokes_list, pager = author_jokes_page(username, request.args)
+    except InvalidId:
+        return "Invalid page cursor", 400
+    if not jokes_list and pager["paged"]:
+        # Paged past the end (jokes deleted since); go back to the newest
+        return redirect(url_for("user_jokes", username=username))
+
+    return stream_page(
+        "user_jokes.html", jokes=jokes_list, pager=pager, username=username
     )
-    jokes_list = list(user_jokes_cursor)
-
-    return render_template("user_jokes.html", jokes=jokes_list, username=username)
 
 
 @app.route("/manage_jokes", methods=["GET", "POST"])
 @login_required
 def manage_jokes():
-    """Page for users to bulk edit/delete their jokes."""
+    """Page for users to bulk edit/delete their jokes, one page at a time."""
     if request.method == "POST":
         action = request.form.get("action")
+        # Back to the page the form was on
+        page_args = {key: request.form[key] for key in PAGE_ARGS if request.form.get(key)}
 
         if action == "delete":
             ids_to_delete_str = request.form.getlist("delete_ids")
             if not ids_to_delete_str:
                 flash("No jokes selected for deletion.", "error")
-                return redirect(url_for("manage_jokes"))
+                return redirect(url_for("manage_jokes", **page_args))
 
             oids_to_delete = [ObjectId(id_str) for id_str in ids_to_delete_str]
 
@@ -215,32 +315,42 @@ def manage_jokes():
                     "author_username": current_user.username,
                 }
             )
+            for oid in oids_to_delete:
+                joke_pool.discard(oid)
             flash(f"{result.deleted_count} joke(s) deleted successfully.", "success")
 
         elif action == "update":
             updates = []
+            submitted = {
+                key.split("_", 1)[1]: new_content.strip()
+                for key, new_content in request.form.items()
+                if key.startswith("content_") and ObjectId.is_valid(key.split("_", 1)[1])
+            }
+            # Only the jokes on the submitted page, and only the user's own
             user_jokes = {
                 str(j["_id"]): j["content"]
                 for j in jokes_collection.find(
-                    {"author_username": current_user.username}, {"content": 1}
+                    {
+                        "_id": {"$in": [ObjectId(joke_id) for joke_id in submitted]},
+                        "author_username": current_user.username,
+                    },
+                    {"content": 1},
                 )
             }
 
-            for key, new_content in request.form.items():
-                if key.startswith("content_"):
-                    joke_id = key.split("_", 1)[1]
-                    stripped_content = new_content.strip()
-                    if (
-                        joke_id in user_jokes
-                        and user_jokes[joke_id] != stripped_content
-                        and stripped_content
-                    ):
-                        updates.append(
-                            UpdateOne(
-                                {"_id": ObjectId(joke_id)},
-                                {"$set": {"content": stripped_content}},
-                            )
+            for joke_id, stripped_content in submitted.items():
+                if (
+                    joke_id in user_jokes
+                    and user_jokes[joke_id] != stripped_content
+                    and stripped_content
+                ):
+                    updates.append(
+                        UpdateOne(
+                            {"_id": ObjectId(joke_id)},
+                            {"$set": {"content": stripped_content}},
                         )
+                    )
+                    joke_pool.discard(ObjectId(joke_id))
             if updates:
                 try:
                     result = jokes_collection.bulk_write(updates)
@@ -253,25 +363,70 @@ def manage_jokes():
             else:
                 flash("No changes detected to update.", "info")
 
-        return redirect(url_for("manage_jokes"))
+        return redirect(url_for("manage_jokes", **page_args))
 
     # --- GET Request Logic ---
-    user_jokes_cursor = jokes_collection.find(
-        {"author_username": current_user.username}
-    ).sort("_id", DESCENDING)
-    jokes_list = list(user_jokes_cursor)
-    return render_template("manage_jokes.html", jokes=jokes_list)
+    try:
+        jokes_list, pager = author_jokes_page(current_user.username, request.args)
+    except InvalidId:
+        return "Invalid page cursor", 400
+    if not jokes_list and pager["paged"]:
+        return redirect(url_for("manage_jokes"))
+
+    # Jokes are numbered oldest = #1, so count up to the newest on this page
+    first_number = 0
+    if jokes_list:
+        first_number = jokes_collection.count_documents(
+            {
+                "author_username": current_user.username,
+                "_id": {"$lte": jokes_list[0]["_id"]},
+            }
+        )
+    return stream_page(
+        "manage_jokes.html", jokes=jokes_list, pager=pager, first_number=first_number
+    )
 
 
 # --- API Endpoint for Infinite Scroll ---
 
 
+def _unseen_jokes(seen, count):
+    """Take up to count jokes from the pool that are not in the seen filter."""
+    jokes = []
+    for _ in range(3):
+        for joke in joke_pool.take(count - len(jokes)):
+            if joke["_id"] not in seen:
+                seen.add(joke["_id"])
+                joke["_id"] = str(joke["_id"])
+                jokes.append(joke)
+        if len(jokes) == count:
+            break
+    return jokes
+
+
 @app.route("/api/jokes")
 def get_jokes():
-    """API endpoint to fetch one random joke for the infinite scroll."""
-    # This pipeline will return an empty list if the collection is empty, which is safe.
-    pipeline = [{"$sample": {"size": 1}}]
-    jokes = list(jokes_collection.aggregate(pipeline))
+    """API endpoint to fetch random jokes for the infinite scroll.
+
+    Returns one joke object, or with ?count=N a page of up to
+    MAX_JOKES_PER_REQUEST jokes: {"jokes": [...], "seen": token}. Passing
+    the token back as ?seen= skips every joke already returned with it.
+    """
+    count = request.args.get("count", type=int)
+    if count is not None:
+        count = max(1, min(count, MAX_JOKES_PER_REQUEST))
+        seen = SeenFilter.from_token(request.args.get("seen"))
+        if seen.saturated():
+            seen = SeenFilter()
+        jokes = _unseen_jokes(seen, count)
+        if not jokes:
+            # The client has seen them all; start another round
+            seen = SeenFilter()
+            jokes = _unseen_jokes(seen, count)
+        return jsonify({"jokes": jokes, "seen": seen.to_token()})
+
+    # Empty list if the collection is empty, which is safe.
+    jokes = joke_pool.take(1)
 
     if not jokes:
         # If no jokes are found, return an empty object with a 200 status.
@@ -311,6 +466,7 @@ def edit_joke(joke_id):
             jokes_collection.update_one(
                 {"_id": oid}, {"$set": {"content": updated_content}}
             )
+            joke_pool.discard(oid)
             flash("Joke updated successfully!", "success")
             return redirect(url_for("user_jokes", username=joke["author_username"]))
         else:
@@ -340,9 +496,50 @@ def delete_joke(joke_id):
         return redirect(url_for("index"))
 
     jokes_collection.delete_one({"_id": oid})
+    joke_pool.discard(oid)
     flash("Joke deleted successfully.", "success")
     return redirect(url_for("user_jokes", username=joke["author_username"]))
 
 
+# --- Index Management (flask --app app ensure-indexes / check-indexes) ---
+
+
+@app.cli.command("ensure-indexes")
+def ensure_indexes_command():
+    """Create the declared indexes and list any undeclared ones."""
+    for name, created in ensure_indexes(db).items():
+        click.echo(f"{name}: {', '.join(created)}")
+    for name, extra in undeclared_indexes(db).items():
+        if extra:
+            click.echo(f"{name}: not declared in indexes.py: {', '.join(extra)}")
+
+
+@app.cli.command("check-indexes")
+@click.option("--username", help="Author to explain with (default: any author)")
+def check_indexes_command(username):
+    """Explain the user page queries; exit 1 if one scans or sorts in memory."""
+    if username is None:
+        sample = jokes_collection.find_one({}, {"author_username": 1})
+        username = sample["author_username"] if sample else ""
+    limit = JOKES_PER_PAGE + 1
+    queries = {
+        "first page": author_jokes(username).limit(limit),
+        "older page (?before=)": author_jokes(username, before=ObjectId()).limit(limit),
+        "newer page (?after=)": author_jokes(username, after=ObjectId("0" * 24)).limit(limit),
+        "manage page numbering": jokes_collection.find(
+            {"author_username": username, "_id": {"$lte": ObjectId()}}, {"_id": 1}
+        ),
+    }
+    failed = False
+    for label, cursor in queries.items():
+        summary, problems = plan_problems(cursor.explain())
+        click.echo(f"{label}: {' <- '.join(summary)}")
+        for problem in problems:
+            click.echo(f"  !! {problem}")
+        failed = failed or bool(problems)
+    if failed:
+        raise SystemExit(1)
+
+
 if __name__ == "__main__":
     app.run(debug=True)
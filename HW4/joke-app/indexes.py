@@ -0,0 +1,63 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# Every index the app relies on, by collection. create_indexes() is a no-op
+# for an index that already exists with the same keys and options, so these
+# are safe to apply on every start.
+INDEXES = {
+    "users": [
+        # Login and profile lookups; also keeps usernames unique
+        IndexModel([("username", ASCENDING)], unique=True),
+    ],
+    "jokes": [
+        # A user's jokes, newest first: the user page and the manage page
+        IndexModel([("author_username", ASCENDING), ("_id", DESCENDING)]),
+    ],
+}
+
+
+def ensure_indexes(db):
+    """Create any declared index that is missing. Returns {collection: [names]}."""
+    return {
+        name: db[name].create_indexes(models) for name, models in INDEXES.items()
+    }
+
+
+def undeclared_indexes(db):
+    """Indexes present in the database that INDEXES does not declare."""
+    extra = {}
+    for name, models in INDEXES.items():
+        declared = {model.document["name"] for model in models} | {"_id_"}
+        names = [index["name"] for index in db[name].list_indexes()]
+        extra[name] = [n for n in names if n not in declared]
+    return extra
+
+
+def _stages(plan):
+    """Walk an explain plan tree, yielding every stage document."""
+    if "stage" in plan:
+        yield plan
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            yield from _stages(plan[key])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+def plan_problems(explain):
+    """Return (stage summary, problems) for the winning plan of a find().explain().
+
+    A COLLSCAN reads the whole collection and a SORT stage sorts the
+    matches in memory; an index-backed query has neither.
+    """
+    stages = list(_stages(explain["queryPlanner"]["winningPlan"]))
+    summary = [
+        f"{stage['stage']}({stage['indexName']})" if "indexName" in stage else stage["stage"]
+        for stage in stages
+    ]
+    problems = []
+    for stage in stages:
+        if stage["stage"] == "COLLSCAN":
+            problems.append("collection scan")
+        elif stage["stage"] == "SORT":
+            problems.append("in-memory sort")
+    return summary, problems
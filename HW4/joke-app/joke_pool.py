@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+from collections import deque
+
+
+class JokePool:
+    """Pre-shuffled buffer of random jokes for the home page and infinite scroll.
+
+    Instead of one $sample aggregation per request, a background thread tops
+    the buffer up with one large $sample batch whenever it drops below
+    low_water, and requests just pop from memory. Entries older than max_age
+    seconds are thrown away so edits and deletes show up within that time;
+    the edit/delete routes also discard() the joke right away. Each worker
+    process has its own pool and starts its refill thread on first use.
+    """
+
+    def __init__(self, collection, size=500, batch=200, low_water=100, max_age=300):
+        self.collection = collection
+        self.size = size
+        self.batch = batch
+        self.low_water = low_water
+        self.max_age = max_age
+        self._jokes = deque()  # (fetched_at, joke)
+        self._ids = set()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pid = None
+
+    def _sample(self, size):
+        pipeline = [
+            {"$sample": {"size": size}},
+            {"$project": {"content": 1, "author_username": 1}},
+        ]
+        return list(self.collection.aggregate(pipeline))
+
+    def _add(self, jokes):
+        now = time.monotonic()
+        with self._lock:
+            for joke in jokes:
+                if joke["_id"] not in self._ids and len(self._jokes) < self.size:
+                    self._ids.add(joke["_id"])
+                    self._jokes.append((now, joke))
+
+    def refill(self):
+        """Top the buffer up to `size` with $sample batches."""
+        while len(self._jokes) < self.size:
+            before = len(self._jokes)
+            jokes = self._sample(min(self.batch, self.size - before))
+            self._add(jokes)
+            # Small collections: once a batch adds nothing new we hold them all
+            if len(self._jokes) == before:
+                break
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            try:
+                self.refill()
+            except Exception:
+                time.sleep(1)  # database hiccup; retry on the next request
+                self._wake.set()
+
+    def _ensure_started(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    # Forked (gunicorn worker): the parent's thread did not come along
+                    self._jokes.clear()
+                    self._ids.clear()
+                    threading.Thread(target=self._run, daemon=True).start()
+                    self._pid = os.getpid()
+
+    def take(self, n):
+        """Pop up to n random jokes; fetches synchronously only when the pool runs short."""
+        self._ensure_started()
+        jokes = self._pop(n)
+        if len(jokes) < n:
+            # Cold start or drained faster than the refill: top up in-line
+            self._add(self._sample(max(n, self.batch)))
+            seen = {joke["_id"] for joke in jokes}
+            jokes += [j for j in self._pop(n - len(jokes)) if j["_id"] not in seen]
+        if len(self._jokes) < self.low_water:
+            self._wake.set()
+        return jokes
+
+    def _pop(self, n):
+        expired_before = time.monotonic() - self.max_age
+        jokes = []
+        with self._lock:
+            while self._jokes and len(jokes) < n:
+                fetched_at, joke = self._jokes.popleft()
+                self._ids.discard(joke["_id"])
+                if fetched_at >= expired_before:
+                    jokes.append(joke)
+        return jokes
+
+    def discard(self, joke_id):
+        """Drop an edited or deleted joke from the buffer."""
+        with self._lock:
+            if joke_id in self._ids:
+                self._ids.discard(joke_id)
+                self._jokes = deque(item for item in self._jokes if item[1]["_id"] != joke_id)
+
+    def stats(self):
+        with self._lock:
+            return {"buffered": len(self._jokes), "size": self.size}
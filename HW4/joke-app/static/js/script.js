@@ -1,88 +1,130 @@
-// Replace the entire contents of static/js/script.js with this updated version
-
 document.addEventListener("DOMContentLoaded", () => {
   const jokeContainer = document.getElementById("joke-container");
+  if (!jokeContainer) return; // Only the home page scrolls for more jokes
   const loadingIndicator = document.getElementById("loading");
   const currentUsername = document.body.dataset.username; // Get username from body data attribute
-  let isLoading = false;
+  const PAGE_SIZE = 10; // jokes per /api/jokes request
+  const BATCH = 3; // jokes rendered per scroll to the bottom
+  const PREFETCH_BELOW = 5; // fetch the next page when fewer are queued
+
+  // Opaque filter of jokes already served, from the page or the last response
+  let seenToken = jokeContainer.dataset.seen || "";
+  const shownIds = new Set(
+    Array.from(document.querySelectorAll(".joke-card[data-joke-id]"), (card) => card.dataset.jokeId)
+  );
+  const queue = [];
+  let pending = null; // in-flight page request
+
+  const fetchPage = () => {
+    if (!pending) {
+      const params = new URLSearchParams({ count: PAGE_SIZE, seen: seenToken });
+      pending = fetch(`/api/jokes?${params}`)
+        .then((response) => response.json())
+        .then((data) => {
+          seenToken = data.seen || "";
+          queue.push(...(data.jokes || []));
+        })
+        .catch((error) => console.error("Failed to fetch more jokes:", error))
+        .finally(() => {
+          pending = null;
+        });
+    }
+    return pending;
+  };
+
+  const renderJoke = (joke) => {
+    // --- Create the joke card ---
+    const jokeCard = document.createElement("div");
+    jokeCard.className = "joke-card";
+
+    const jokeParagraph = document.createElement("p");
+    jokeParagraph.style.whiteSpace = "pre-wrap";
+    jokeParagraph.textContent = joke.content;
+
+    const jokeAuthorSmall = document.createElement("small");
+    jokeAuthorSmall.textContent = "- Posted by "; // Text before the link
+
+    const authorLink = document.createElement("a");
+    authorLink.className = "author-link";
+    authorLink.href = `/user/${joke.author_username}`;
+    authorLink.textContent = joke.author_username;
+
+    jokeAuthorSmall.appendChild(authorLink);
+
+    jokeCard.appendChild(jokeParagraph);
+    jokeCard.appendChild(jokeAuthorSmall);
+
+    // --- NEW: Add edit/delete controls if user is the author ---
+    if (currentUsername && joke.author_username === currentUsername) {
+      const controlsDiv = document.createElement("div");
+      controlsDiv.className = "joke-controls";
+
+      // Edit link
+      const editLink = document.createElement("a");
+      editLink.href = `/edit_joke/${joke._id}`;
+      editLink.className = "edit-link";
+      editLink.textContent = "Edit";
+
+      // Delete form and button
+      const deleteForm = document.createElement("form");
+      deleteForm.action = `/delete_joke/${joke._id}`;
+      deleteForm.method = "POST";
+      deleteForm.onsubmit = () =>
+        confirm("Are you sure you want to delete this joke?");
+
+      const deleteButton = document.createElement("button");
+      deleteButton.type = "submit";
+      deleteButton.className = "delete-button";
+      deleteButton.textContent = "Delete";
 
-  const fetchJoke = async () => {
+      deleteForm.appendChild(deleteButton);
+      controlsDiv.appendChild(editLink);
+      controlsDiv.appendChild(deleteForm);
+
+      jokeCard.appendChild(controlsDiv);
+    }
+
+    jokeContainer.appendChild(jokeCard);
+  };
+
+  const showMore = async () => {
+    if (queue.length === 0) {
+      loadingIndicator.style.display = "block";
+      await fetchPage();
+      loadingIndicator.style.display = "none";
+    }
+    let rendered = 0;
+    while (queue.length > 0 && rendered < BATCH) {
+      const joke = queue.shift();
+      // The seen filter already skips repeats; this catches overlapping pages
+      if (!joke.content || shownIds.has(joke._id)) continue;
+      shownIds.add(joke._id);
+      renderJoke(joke);
+      rendered++;
+    }
+    // Have the next page ready before the reader gets there
+    if (queue.length < PREFETCH_BELOW) fetchPage();
+  };
+
+  let isLoading = false;
+  const loadMore = async () => {
     if (isLoading) return;
     isLoading = true;
-    loadingIndicator.style.display = "block";
-
     try {
-      const response = await fetch("/api/jokes");
-      const joke = await response.json();
-
-      if (joke && joke.content) {
-        // --- Create the joke card ---
-        const jokeCard = document.createElement("div");
-        jokeCard.className = "joke-card";
-
-        const jokeParagraph = document.createElement("p");
-        jokeParagraph.style.whiteSpace = "pre-wrap";
-        jokeParagraph.textContent = joke.content;
-
-        const jokeAuthorSmall = document.createElement("small");
-        jokeAuthorSmall.textContent = "- Posted by "; // Text before the link
-
-        const authorLink = document.createElement("a");
-        authorLink.className = "author-link";
-        authorLink.href = `/user/${joke.author_username}`;
-        authorLink.textContent = joke.author_username;
-
-        jokeAuthorSmall.appendChild(authorLink);
-
-        jokeCard.appendChild(jokeParagraph);
-        jokeCard.appendChild(jokeAuthorSmall);
-
-        // --- NEW: Add edit/delete controls if user is the author ---
-        if (currentUsername && joke.author_username === currentUsername) {
-          const controlsDiv = document.createElement("div");
-          controlsDiv.className = "joke-controls";
-
-          // Edit link
-          const editLink = document.createElement("a");
-          editLink.href = `/edit_joke/${joke._id}`;
-          editLink.className = "edit-link";
-          editLink.textContent = "Edit";
-
-          // Delete form and button
-          const deleteForm = document.createElement("form");
-          deleteForm.action = `/delete_joke/${joke._id}`;
-          deleteForm.method = "POST";
-          deleteForm.onsubmit = () =>
-            confirm("Are you sure you want to delete this joke?");
-
-          const deleteButton = document.createElement("button");
-          deleteButton.type = "submit";
-          deleteButton.className = "delete-button";
-          deleteButton.textContent = "Delete";
-
-          deleteForm.appendChild(deleteButton);
-          controlsDiv.appendChild(editLink);
-          controlsDiv.appendChild(deleteForm);
-
-          jokeCard.appendChild(controlsDiv);
-        }
-
-        jokeContainer.appendChild(jokeCard);
-      }
-    } catch (error) {
-      console.error("Failed to fetch a new joke:", error);
+      await showMore();
     } finally {
-      loadingIndicator.style.display = "none";
       isLoading = false;
     }
   };
 
+  fetchPage();
+
   window.addEventListener("scroll", () => {
     if (
       window.innerHeight + window.scrollY >=
       document.body.offsetHeight - 100
     ) {
-      fetchJoke();
+      loadMore();
     }
   });
 });